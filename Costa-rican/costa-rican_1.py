@@ -1,3 +1,4 @@
+import sys
 import warnings
 import numpy as np
 import pandas as pd
@@ -9,6 +10,12 @@ from scipy.stats import spearmanr
 from collections import Counter
 from collections import OrderedDict
 
+sys.path.append("..")
+from common import read_csv, correlated_columns
+from household_agg import aggregate
+from feature_rules import apply_rules, HOUSEHOLD_RULES, INDIVIDUAL_RULES
+from model_zoo import run_zoo
+
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
 plt.style.use("fivethirtyeight")
@@ -18,8 +25,8 @@ plt.rcParams["patch.edgecolor"] = "k"
 pd.options.display.max_columns = 150
 
 # Read in data
-train = pd.read_csv("data/train.csv")
-test = pd.read_csv("data/test.csv")
+train = read_csv("data/train.csv")
+test = read_csv("data/test.csv")
 """
 print(train.head())
 
@@ -281,14 +288,14 @@ heads = data.loc[data["parentesco1"] == 1, :]
 heads = heads[id_ + hh_bool + hh_cont + hh_ordered]
 print(heads.shape)
 
-corr_matrix = heads.corr()
-upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(np.bool))
-to_drop = [column for column in upper.columns if any(abs(upper[column]) > 0.95)]
+to_drop = correlated_columns(heads, threshold=0.95)
 print(to_drop)
 
-print(corr_matrix.loc[corr_matrix["tamhog"].abs() > 0.9, corr_matrix["tamhog"].abs() > 0.9])
-sns.heatmap(corr_matrix.loc[corr_matrix["tamhog"].abs() > 0.9, corr_matrix["tamhog"].abs() > 0.9],
-            annot=True, cmap=plt.cm.autumn_r, fmt=".3f")
+# only the columns close to tamhog are correlated in full, for the heatmap
+near = heads.select_dtypes("number").corrwith(heads["tamhog"]).abs()
+near = near.index[near > 0.9]
+print(heads[near].corr())
+sns.heatmap(heads[near].corr(), annot=True, cmap=plt.cm.autumn_r, fmt=".3f")
 plt.show()
 
 heads = heads.drop(columns=["tamhog", "hogar_total", "r4t3"])
@@ -299,47 +306,29 @@ plt.show()
 heads["hhsize-diff"] = heads["tamviv"] - heads["hhsize"]
 plot_categoricals("hhsize-diff", "Target", heads)
 
-corr_matrix.loc[corr_matrix["coopele"].abs() > 0.9, corr_matrix["coopele"].abs() > 0.9]
-
-elec = []
-for i, row in heads.iterrows():
-    if row["noelec"] == 1:
-        elec.append(0)
-    elif row["coopele"] == 1:
-        elec.append(1)
-    elif row["public"] == 1:
-        elec.append(0)
-    elif row["planpri"] == 1:
-        elec.append(0)
-    else:
-        elec.append(np.nan)
+near = heads.select_dtypes("number").corrwith(heads["coopele"]).abs()
+near = near.index[near > 0.9]
+heads[near].corr()
 
-heads["elec"] = elec
-heads["elec-missing"] = heads["elec"].isnull()
+# elec, walls / roof / floor ordinals, warning / bonus scores and per capita features (feature_rules.HOUSEHOLD_RULES)
+heads = apply_rules(heads, HOUSEHOLD_RULES)
 
 plot_categoricals("elec", "Target", heads)
 
 heads = heads.drop(columns="area2")
 print(heads.groupby("area1")["Target"].value_counts(normalize=True))
 
-heads["walls"] = np.argmax(np.array(heads[["epared1", "epared2", "epared3"]]), axis=1)
 plot_categoricals("walls", "Target", heads)
 
-heads["roof"] = np.argmax(np.array(heads[["etecho1", "etecho2", "etecho3"]]), axis=1)
 heads = heads.drop(columns=["etecho1", "etecho2", "etecho3"])
-heads["floor"] = np.argmax(np.array(heads[["eviv1", "eviv2", "eviv3"]]), axis=1)
 
 # Feature Construction
-heads["walls+roof+floor"] = heads["walls"] + heads["roof"] + heads["floor"]
 plot_categoricals("walls+roof+floor", "Target", heads, annotate=False)
 
 counts = pd.DataFrame(heads.groupby(["walls+roof+floor"])["Target"].value_counts(normalize=True))\
     .rename(columns={"Target": "Normalized Count"}).reset_index()
 print(counts.head())
 
-heads["warning"] = 1 * (heads["sanitario1"] + (heads["elec"] == 0) + heads["pisonotiene"]
-                        + heads["abastaguano"] + (heads["cielorazo"] == 0))
-
 plt.figure(figsize=(10, 6))
 sns.violinplot(x="warning", y="Target", data=heads)
 plt.title("Target vs Warning Variable")
@@ -347,17 +336,10 @@ plt.show()
 
 plot_categoricals("warning", "Target", data=heads)
 
-heads["bonus"] = 1 * (heads["refrig"] + heads["computer"] + (heads["v18q1"] > 0) + heads["television"])
 sns.violinplot(x="bonus", y="Target", data=heads)
 plt.title('Target vs Bonus Variable')
 plt.show()
 
-# Per Capita Feature
-heads["phone-per-capita"] = heads["qmobilephone"] / heads["tamviv"]
-heads["tablets-per-capita"] = heads["v18q1"] / heads["tamviv"]
-heads["rooms-per-capita"] = heads["rooms"] / heads["tamviv"]
-heads["rent-per-capita"] = heads["v2a1"] / heads["tamviv"]
-
 
 def plot_corrs(x, y):
     spr = spearmanr(x, y).correlation
@@ -453,16 +435,15 @@ household_feats = list(heads.columns)
 ind = data[id_ + ind_bool + ind_ordered]
 print(ind.shape)
 
-corr_matrix = ind.corr()
-upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(np.bool))
-to_drop = [column for column in upper.columns if any(abs(upper[column]) > 0.95)]
+to_drop = correlated_columns(ind, threshold=0.95)
 print(to_drop)
 
 ind = data.drop(columns="male")
 
 print(ind[[c for c in ind if c.startswith("instl")]].head())
 
-ind["inst"] = np.argmax(np.array(ind[[c for c in ind if c.startswith("instl")]]), axis=1)
+# inst ordinal, escolari/age, inst/age and tech (feature_rules.INDIVIDUAL_RULES)
+ind = apply_rules(ind, INDIVIDUAL_RULES)
 plot_categoricals("inst", "Target", ind, annotate=False)
 
 plt.figure(figsize=(10, 8))
@@ -472,40 +453,20 @@ plt.show()
 
 print(ind.shape)
 
-ind["escolari/age"] = ind["escolari"] / ind["age"]
-
 plt.figure(figsize=(10, 8))
 sns.violinplot(x="Target", y="escolari/age", data=ind)
 plt.show()
 
-ind["inst/age"] = ind["inst"] / ind["age"]
-ind["tech"] = ind["v18q"] + ind["mobilephone"]
 print(ind["tech"].describe())
 
-range_ = lambda x: x.max() - x.min()
-range_.__name__ = "range_"
-
-ind_agg = ind.drop(columns="Target").groupby("idhogar").agg(["min", "max", "sum", "count", "std", range_])
-print(ind_agg.head())
-
-new_col = []
-for c in ind_agg.columns.levels[0]:
-    for stat in ind_agg.columns.levels[1]:
-        new_col.append(f"{c}-{stat}")
-
-ind_agg.columns = new_col
+# min, max, sum, count, std and range_ (max - min) of every individual feature, as flat "<feature>-<stat>" columns
+ind_agg = aggregate(ind.drop(columns="Target"), by="idhogar")
 print(ind_agg.head())
 
 ind_agg.iloc[:, [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]].head()
 
-# Create correlation matrix
-corr_matrix = ind_agg.corr()
-
-# Select upper triangle of correlation matrix
-upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1).astype(np.bool))
-
-# Find index of feature columns with correlation greater than 0.95
-to_drop = [column for column in upper.columns if any(abs(upper[column]) > 0.95)]
+# Columns correlated above 0.95 with an earlier column
+to_drop = correlated_columns(ind_agg, threshold=0.95)
 
 print(f'There are {len(to_drop)} correlated columns to remove.')
 
@@ -570,7 +531,6 @@ from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import Imputer
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import cross_val_score
 
 final = joblib.load(open("data/final.joblib", "rb"))
 
@@ -590,6 +550,8 @@ pipeline = Pipeline([("imputer", Imputer(strategy="median")),
 train_set = pipeline.fit_transform(train_set)
 test_set = pipeline.fit_transform(test_set)
 """
+from sklearn.model_selection import cross_val_score
+
 model = RandomForestClassifier(n_estimators=100, random_state=10, n_jobs=-1)
 cv_score = cross_val_score(model, train_set, train_labels, cv=10, scoring=scorer)
 
@@ -704,36 +666,33 @@ warnings.filterwarnings("ignore", category=ConvergenceWarning)
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
 
-model_results = pd.DataFrame(columns=["model", "cv_mean", "cv_std"])
+model_results = None
 
 
-def cv_model(train, train_labels, model, name, model_results=None):
-    cv_scores = cross_val_score(model, train, train_labels, cv=10, scoring=scorer, n_jobs=1)
-    print(f"{name} 10 Fold CV Score: {round(cv_scores.mean(), 5)} with std: {round(cv_scores.std(), 5)}")
-
-    if model_results is not None:
-        model_results = model_results.append(pd.DataFrame({"model": name,
-                                                           "cv_mean": cv_scores.mean(),
-                                                           "cv_std": cv_scores.std},
-                                                          index=[0]),
-                                             ignore_index=True)
+def candidate_models(suffix=""):
+    models = OrderedDict([("LSVC", LinearSVC()),
+                          ("GNB", GaussianNB()),
+                          ("MLP", MLPClassifier(hidden_layer_sizes=(32, 64, 128, 64, 32))),
+                          ("LDA", LinearDiscriminantAnalysis()),
+                          ("RIDGE", RidgeClassifierCV())])
+    for n in [5, 10, 15]:
+        models[f"KNN-{n}"] = KNeighborsClassifier(n_neighbors=n)
+    models["EXT"] = ExtraTreesClassifier(n_estimators=100, random_state=10)
+    models["RF"] = RandomForestClassifier(n_estimators=100, random_state=10)
+    return OrderedDict((name + suffix, model) for name, model in models.items())
 
-        return model_results
-"""
-model_results = cv_model(train_set, train_labels, LinearSVC(), "LSVC", model_results)
-model_results = cv_model(train_set, train_labels, GaussianNB(), "GNB", model_results)
-model_results = cv_model(train_set, train_labels, MLPClassifier(hidden_layer_sizes=(32, 64, 128, 64, 32)),
-                         "MLP", model_results)
-model_results = cv_model(train_set, train_labels, LinearDiscriminantAnalysis(), "LDA", model_results)
-model_results = cv_model(train_set, train_labels, RidgeClassifierCV(), "RIDGE", model_results)
 
-for n in [5, 10, 15]:
-    model_results = cv_model(train_set, train_labels, KNeighborsClassifier(n_neighbors=n), f"KNN-{n}", model_results)
+def cv_model(train, train_labels, models, model_results=None):
+    """10 fold CV of {name: model} in parallel, fold scores cached in data/.cache/cv (model_zoo.run_zoo)."""
+    results = run_zoo(models, train, train_labels, cv=10, scoring=scorer)
+    for row in results.itertuples():
+        print(f"{row.model} 10 Fold CV Score: {round(row.cv_mean, 5)} with std: {round(row.cv_std, 5)}")
 
-model_results = cv_model(train_set, train_labels, ExtraTreesClassifier(n_estimators=100, random_state=10),
-                         "EXT", model_results)
-model_results = cv_model(train_set, train_labels, RandomForestClassifier(n_estimators=100, random_state=10),
-                         "RF", model_results)
+    if model_results is not None:
+        results = pd.concat([model_results, results], ignore_index=True)
+    return results
+"""
+model_results = cv_model(train_set, train_labels, candidate_models(), model_results)
 
 model_results.set_index("model", inplace=True)
 # model_results["cv_mean"].plot.bar(color="orange",
@@ -791,9 +750,7 @@ submission.to_csv('data/rf_submission.csv', index=False)
 # Feature Selection
 train_set = pd.DataFrame(train_set, columns=features)
 
-corr_matrix = train_set.corr()
-upper = corr_matrix.where(np.triu(np.ones(corr_matrix.shape), k=1). astype(np.bool))
-to_drop = [column for column in upper.columns if any(abs(upper[column]) > 0.95)]
+to_drop = correlated_columns(train_set, threshold=0.95)
 print(to_drop)
 
 train_set = train_set.drop(columns=to_drop)
@@ -803,15 +760,16 @@ test_set = pd.DataFrame(test_set, columns=features)
 train_set, test_set = train_set.align(test_set, axis=1, join="inner")
 features = list(train_set.columns)
 
-from sklearn.feature_selection import RFECV
-from tqdm import tqdm
+from feature_elimination import IncrementalRFECV
 
+# 10% of the remaining features per round, then every size around the best round; folds run in parallel
+# and progress is checkpointed, so an interrupted selection resumes where it stopped
 estimator = RandomForestClassifier(random_state=10, n_estimators=100, n_jobs=1)
-selector = RFECV(estimator, step=1, cv=3, scoring=scorer, n_jobs=1)
+selector = IncrementalRFECV(estimator, cv=3, scoring=scorer, fraction=0.1, checkpoint="data/rfecv.pkl")
 
 selector.fit(train_set, train_labels)
 
-plt.plot(selector.grid_scores_)
+plt.plot(selector.grid_scores_.index, selector.grid_scores_.values)
 plt.xlabel("Number of Feature")
 plt.ylabel("Macro F1 Score")
 plt.title("Feature Selection Scores")
@@ -829,17 +787,4 @@ selected_features = train_set.columns[np.where(selector.ranking_ == 1)]
 train_selected = pd.DataFrame(train_selected, columns=selected_features)
 test_selected = pd.DataFrame(test_selected, columns=selected_features)
 
-model_results = cv_model(train_selected, train_labels, LinearSVC(), "LSVC-SEL", model_results)
-model_results = cv_model(train_selected, train_labels, GaussianNB(), "GNB-SEL", model_results)
-model_results = cv_model(train_selected, train_labels, MLPClassifier(hidden_layer_sizes=(32, 64, 128, 64, 32)),
-                         "MLP-SEL", model_results)
-model_results = cv_model(train_selected, train_labels, LinearDiscriminantAnalysis(), "LDA-SEL", model_results)
-model_results = cv_model(train_selected, train_labels, RidgeClassifierCV(), "RIDGE-SEL", model_results)
-
-for n in [5, 10, 15]:
-    model_results = cv_model(train_selected, train_labels, KNeighborsClassifier(n_neighbors=n), f"KNN-{n}-SEL", model_results)
-
-model_results = cv_model(train_selected, train_labels, ExtraTreesClassifier(n_estimators=100, random_state=10),
-                         "EXT-SEL", model_results)
-model_results = cv_model(train_selected, train_labels, RandomForestClassifier(n_estimators=100, random_state=10),
-                         "RF-SEL", model_results)
+model_results = cv_model(train_selected, train_labels, candidate_models("-SEL"), model_results)
@@ -0,0 +1,199 @@
+import os
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import as_completed
+from sklearn.base import clone, is_classifier
+from sklearn.model_selection import check_cv
+
+from common.process_pool import can_fork, fork_pool
+from model_zoo import data_hash, params_hash
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+_data = {}
+
+
+def geometric_sizes(n_features, fraction=0.1, min_features=1):
+    """Feature counts from n_features down to min_features, removing `fraction` of the remaining ones per round."""
+    sizes = [n_features]
+    while sizes[-1] > min_features:
+        sizes.append(max(min_features, sizes[-1] - max(1, int(sizes[-1] * fraction))))
+    return sizes
+
+
+def importances(model):
+    if hasattr(model, "feature_importances_"):
+        return model.feature_importances_
+    coef = np.abs(np.atleast_2d(model.coef_))
+    return coef.sum(axis=0)
+
+
+def _init_worker(X, y, estimator, scoring):
+    os.environ["OMP_NUM_THREADS"] = "1"
+    if threadpool_limits is not None:
+        threadpool_limits(1)
+    _data.update(X=X, y=y, estimator=estimator, scoring=scoring)
+
+
+def _fit_score(features, train_index, test_index):
+    X, y = _data["X"], _data["y"]
+    model = clone(_data["estimator"]).fit(X[np.ix_(train_index, features)], y[train_index])
+    score = None
+    if test_index is not None:
+        score = float(_data["scoring"](model, X[np.ix_(test_index, features)], y[test_index]))
+    return model, score
+
+
+def _coarse(fold, sizes, train_index, test_index):
+    """
+    Eliminates along the coarse schedule, one fit per size. Returns the scores by size and, for every size,
+    its features ordered from most to least important (the importances of that fit, reused by the fine pass).
+    """
+    features = np.arange(_data["X"].shape[1])
+    scores, ranked = {}, {}
+    for size, next_size in zip(sizes, sizes[1:] + [None]):
+        model, scores[size] = _fit_score(features, train_index, test_index)
+        features = features[np.argsort(-importances(model), kind="stable")]
+        ranked[size] = features
+        if next_size is not None:
+            features = features[:next_size]
+    return fold, scores, ranked
+
+
+def _fine(fold, fine_sizes, train_index, test_index):
+    """Scores the sizes between coarse steps: the top-k features by the importances of the next larger coarse size."""
+    scores = {}
+    for size, features in fine_sizes:
+        scores[size] = _fit_score(features[:size], train_index, test_index)[1]
+    return fold, scores
+
+
+class IncrementalRFECV:
+    """
+    Recursive feature elimination with cross-validated choice of the number of features, like sklearn's RFECV,
+    but with a coarse-to-fine schedule instead of step=1:
+
+    - coarse pass: every fold eliminates `fraction` of the remaining features per round (10%, then 10% of the
+      rest ...), one fit per round, ranked by the importances of that fit
+    - fine pass: every size between the coarse neighbours of the best coarse size is scored, taking the top
+      features by the importances already computed at the next larger coarse size (no refit for ranking)
+
+    Folds run in parallel in a forked process pool, or one after another in this process where fork is not
+    available. After every finished fold and pass the state is pickled to `checkpoint`, and a later fit with
+    the same estimator, data, folds and schedule resumes from it.
+
+    After fit: n_features_, support_, ranking_ (1 for selected features, higher ranks were eliminated earlier),
+    scores_ (DataFrame of per-fold scores indexed by number of features) and grid_scores_ (mean score for
+    every evaluated number of features, ascending).
+    """
+
+    def __init__(self, estimator, cv=3, scoring=None, fraction=0.1, min_features=1, n_workers=None,
+                 checkpoint=None, verbose=True):
+        self.estimator = estimator
+        self.cv = cv
+        self.scoring = scoring
+        self.fraction = fraction
+        self.min_features = min_features
+        self.n_workers = n_workers
+        self.checkpoint = checkpoint
+        self.verbose = verbose
+
+    def _load_state(self, key):
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint, "rb") as f:
+                state = pickle.load(f)
+            if state["key"] == key:
+                if self.verbose:
+                    print(f"Resuming from {self.checkpoint}: {len(state['coarse'])} coarse, "
+                          f"{len(state['fine'])} fine folds done")
+                return state
+        return {"key": key, "coarse": {}, "fine": {}}
+
+    def _save_state(self, state):
+        if self.checkpoint:
+            with open(self.checkpoint + ".tmp", "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(self.checkpoint + ".tmp", self.checkpoint)
+
+    def _run(self, executor, fn, tasks, done, state):
+        futures = [executor.submit(fn, fold, *args) for fold, args in tasks if fold not in done]
+        for future in as_completed(futures):
+            fold, *result = future.result()
+            done[fold] = result if len(result) > 1 else result[0]
+            self._save_state(state)
+            if self.verbose:
+                print(f"{fn.__name__.strip('_')} pass: fold {fold} done")
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        n_features = X.shape[1]
+        splitter = check_cv(self.cv, y, classifier=is_classifier(self.estimator))
+        folds = list(splitter.split(X, y))
+        sizes = geometric_sizes(n_features, self.fraction, self.min_features)
+
+        key = hashlib.sha1(f"{params_hash(self.estimator)}|{data_hash(X, y)}|{splitter!r}|{self.scoring!r}|"
+                           f"{sizes}".encode()).hexdigest()
+        state = self._load_state(key)
+
+        if not can_fork():
+            _data.update(X=X, y=y, estimator=self.estimator, scoring=self.scoring)
+        n_workers = self.n_workers or min(len(folds), os.cpu_count() or 1)
+        with fork_pool(n_workers, _init_worker, (X, y, self.estimator, self.scoring),
+                       name="feature elimination") as executor:
+            self._run(executor, _coarse, [(fold, (sizes,) + folds[fold]) for fold in range(len(folds))],
+                      state["coarse"], state)
+
+            coarse_scores = pd.DataFrame({fold: state["coarse"][fold][0] for fold in range(len(folds))})
+            best = sizes.index(coarse_scores.mean(axis=1).idxmax())
+            upper = sizes[max(best - 1, 0)]
+            lower = sizes[min(best + 1, len(sizes) - 1)]
+
+            tasks = []
+            for fold in range(len(folds)):
+                ranked = state["coarse"][fold][1]
+                fine_sizes = [(size, ranked[min(s for s in sizes if s > size)])
+                              for size in range(lower + 1, upper) if size not in sizes]
+                tasks.append((fold, (fine_sizes,) + folds[fold]))
+            self._run(executor, _fine, tasks, state["fine"], state)
+
+        scores = {fold: {**state["coarse"][fold][0], **state["fine"][fold]} for fold in range(len(folds))}
+        self.scores_ = pd.DataFrame(scores).sort_index()
+        self.scores_.index.name = "n_features"
+        self.grid_scores_ = self.scores_.mean(axis=1)
+        # the smallest number of features reaching the best mean score, as RFECV does
+        self.n_features_ = int(self.grid_scores_.idxmax())
+
+        self._fit_final(X, y, sizes)
+        return self
+
+    def _fit_final(self, X, y, sizes):
+        """Eliminates on the full data along the coarse schedule down to n_features_, in this process."""
+        _data.update(X=X, y=y, estimator=self.estimator, scoring=self.scoring)
+        rows = np.arange(len(X))
+        features = np.arange(X.shape[1])
+        self.ranking_ = np.ones(X.shape[1], dtype=np.int64)
+        eliminated = []
+
+        coarse = [size for size in sizes if size >= self.n_features_]
+        for size, next_size in zip(coarse, coarse[1:] + [None]):
+            model, _ = _fit_score(features, rows, None)
+            features = features[np.argsort(-importances(model), kind="stable")]
+            keep = next_size if next_size is not None else self.n_features_
+            eliminated.append(features[keep:])
+            features = features[:keep]
+
+        for rank, group in enumerate(reversed([g for g in eliminated if len(g)]), start=2):
+            self.ranking_[group] = rank
+        self.support_ = self.ranking_ == 1
+        self.estimator_ = clone(self.estimator).fit(X[:, self.support_], y)
+        _data.clear()
+
+    def transform(self, X):
+        return np.asarray(X)[:, self.support_]
@@ -0,0 +1,95 @@
+import operator
+import numpy as np
+import pandas as pd
+
+OPS = {"==": operator.eq, "!=": operator.ne, ">": operator.gt, ">=": operator.ge, "<": operator.lt,
+       "<=": operator.le}
+
+# (new column, rule, spec), evaluated in order; a rule can use the columns created before it
+HOUSEHOLD_RULES = [
+    # first flag set to 1 wins, households with none of them get NaN
+    ("elec", "priority", [("noelec", 0), ("coopele", 1), ("public", 0), ("planpri", 0)]),
+    ("elec-missing", "isnull", "elec"),
+    ("walls", "argmax", ["epared1", "epared2", "epared3"]),
+    ("roof", "argmax", ["etecho1", "etecho2", "etecho3"]),
+    ("floor", "argmax", ["eviv1", "eviv2", "eviv3"]),
+    ("walls+roof+floor", "sum", ["walls", "roof", "floor"]),
+    ("warning", "count", ["sanitario1", ("elec", "==", 0), "pisonotiene", "abastaguano", ("cielorazo", "==", 0)]),
+    ("bonus", "count", ["refrig", "computer", ("v18q1", ">", 0), "television"]),
+    ("phone-per-capita", "ratio", ("qmobilephone", "tamviv")),
+    ("tablets-per-capita", "ratio", ("v18q1", "tamviv")),
+    ("rooms-per-capita", "ratio", ("rooms", "tamviv")),
+    ("rent-per-capita", "ratio", ("v2a1", "tamviv")),
+]
+
+INDIVIDUAL_RULES = [
+    ("inst", "argmax", ["instlevel%d" % i for i in range(1, 10)]),
+    ("escolari/age", "ratio", ("escolari", "age")),
+    ("inst/age", "ratio", ("inst", "age")),
+    ("tech", "sum", ["v18q", "mobilephone"]),
+]
+
+
+def _term(get, term):
+    """A column, or a (column, op, value) comparison."""
+    if isinstance(term, tuple):
+        column, op, value = term
+        return OPS[op](get(column), value)
+    return get(term)
+
+
+def _priority(get, spec):
+    return np.select([get(column) == 1 for column, _ in spec], [value for _, value in spec], default=np.nan)
+
+
+def _argmax(get, spec):
+    return np.argmax(np.column_stack([get(column) for column in spec]), axis=1)
+
+
+def _sum(get, spec):
+    return sum(get(column) for column in spec)
+
+
+def _count(get, spec):
+    return sum(np.asarray(_term(get, term), dtype=np.int64) for term in spec)
+
+
+def _ratio(get, spec):
+    numerator, denominator = spec
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return get(numerator) / get(denominator)
+
+
+def _isnull(get, spec):
+    return np.isnan(get(spec))
+
+
+RULES = {"priority": _priority, "argmax": _argmax, "sum": _sum, "count": _count, "ratio": _ratio,
+         "isnull": _isnull}
+
+
+def apply_rules(df, rules):
+    """
+    Evaluates a rule table on a frame with vectorized column operations and returns a copy with the new columns.
+    rules : list of (name, rule, spec) with rule in
+            "priority" : [(flag, value), ...], value of the first flag equal to 1, NaN if none is
+            "argmax" : [one-hot columns], position of the set column (ordinal encoding)
+            "sum" : [columns], plain sum
+            "count" : [column or (column, op, value)], number of true terms (warning / bonus style scores)
+            "ratio" : (numerator, denominator), e.g. per capita features
+            "isnull" : column, missing indicator
+    Columns are read once as numpy arrays, and all new columns are attached in a single concat.
+    """
+    new = {}
+    cache = {}
+
+    def get(column):
+        if column in new:
+            return new[column]
+        if column not in cache:
+            cache[column] = df[column].to_numpy()
+        return cache[column]
+
+    for name, rule, spec in rules:
+        new[name] = RULES[rule](get, spec)
+    return pd.concat([df.drop(columns=[c for c in new if c in df]), pd.DataFrame(new, index=df.index)], axis=1)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+STATS = ("min", "max", "sum", "count", "std", "range_")
+
+
+def _segments(keys):
+    """Sort order of the rows with a key, sorted unique keys and the start of every key's segment."""
+    codes, uniques = pd.factorize(keys, sort=True)
+    rows = np.flatnonzero(codes >= 0)
+    order = rows[np.argsort(codes[rows], kind="stable")]
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    return order, uniques, starts
+
+
+def aggregate(df, by="idhogar", columns=None, stats=STATS, sep="-"):
+    """
+    Per-group min, max, sum, count, std and range of numeric columns, the same values as
+    df.groupby(by).agg(["min", "max", "sum", "count", "std", range_]) with range_ = max - min,
+    computed in one sorted-segment pass with ufunc.reduceat instead of per-group Python calls.
+
+    df (DataFrame) : individual level rows
+    by (str) : group key column, rows with a missing key are dropped
+    columns (list) : columns to aggregate, all numeric / bool columns except `by` by default
+    stats (tuple) : subset of STATS, in output order
+    sep (str) : output columns are named f"{column}{sep}{stat}"
+
+    Returns a float64 DataFrame indexed by the sorted group keys, with flat column names.
+    NaNs are skipped like pandas does: count is the number of non-missing values, sum of no values is 0,
+    min / max / range of no values and std of less than two values are NaN.
+    """
+    if columns is None:
+        columns = [c for c in df.select_dtypes(include=["number", "bool"]).columns if c != by]
+    order, uniques, starts = _segments(df[by].values)
+
+    values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+    missing = np.isnan(values)
+    count = np.add.reduceat(~missing, starts, axis=0).astype(np.float64)
+    empty = count == 0
+
+    result = {"count": count}
+    result["sum"] = np.add.reduceat(np.where(missing, 0, values), starts, axis=0)
+    if {"min", "max", "range_"} & set(stats):
+        result["min"] = np.minimum.reduceat(np.where(missing, np.inf, values), starts, axis=0)
+        result["max"] = np.maximum.reduceat(np.where(missing, -np.inf, values), starts, axis=0)
+        result["min"][empty] = np.nan
+        result["max"][empty] = np.nan
+        result["range_"] = result["max"] - result["min"]
+    if "std" in stats:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = result["sum"] / count
+            deviation = values - np.repeat(mean, np.diff(np.r_[starts, len(values)]), axis=0)
+            squares = np.add.reduceat(np.where(missing, 0, deviation * deviation), starts, axis=0)
+            result["std"] = np.sqrt(squares / (count - 1))
+        result["std"][count < 2] = np.nan
+
+    out = np.empty((len(starts), len(columns) * len(stats)))
+    for j, stat in enumerate(stats):
+        out[:, j::len(stats)] = result[stat]
+    names = [f"{column}{sep}{stat}" for column in columns for stat in stats]
+    return pd.DataFrame(out, index=pd.Index(uniques, name=by), columns=names)
@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import as_completed
+from sklearn.base import clone, is_classifier
+from sklearn.model_selection import check_cv
+
+from common.process_pool import can_fork, fork_pool
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+CACHE_DIR = "data/.cache/cv"
+RESULT_DTYPES = {"model": str, "cv_mean": np.float64, "cv_std": np.float64, "n_folds": np.int64,
+                 "fit_time": np.float64, "n_cached": np.int64}
+
+_data = {}
+
+
+def data_hash(X, y):
+    sha = hashlib.sha1()
+    for values in (X, y):
+        values = np.ascontiguousarray(values)
+        sha.update(repr((values.shape, values.dtype.str)).encode())
+        sha.update(values.data)
+    return sha.hexdigest()
+
+
+def params_hash(model):
+    """Hash of the estimator class and all of its (nested) parameters."""
+    params = sorted((name, repr(value)) for name, value in model.get_params(deep=True).items())
+    description = f"{type(model).__module__}.{type(model).__qualname__}{params!r}"
+    return hashlib.sha1(description.encode()).hexdigest()
+
+
+def _init_worker(X, y, scoring):
+    os.environ["OMP_NUM_THREADS"] = "1"
+    if threadpool_limits is not None:
+        threadpool_limits(1)
+    _data.update(X=X, y=y, scoring=scoring)
+
+
+def _fit_score(name, fold, model, train_index, test_index):
+    X, y = _data["X"], _data["y"]
+    start = time.perf_counter()
+    model = clone(model).fit(X[train_index], y[train_index])
+    fit_time = time.perf_counter() - start
+    return name, fold, float(_data["scoring"](model, X[test_index], y[test_index])), fit_time
+
+
+def _cache_path(cache_dir, name, model, data_key, cv_key, fold):
+    key = hashlib.sha1(f"{params_hash(model)}|{data_key}|{cv_key}|{fold}".encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{name}.{key}.json")
+
+
+def run_zoo(models, X, y, cv=10, scoring=None, n_workers=None, cache_dir=CACHE_DIR):
+    """
+    Cross-validates every model of a zoo, fanning the (model x fold) fits out to a process pool.
+    models : {name: unfitted estimator}, in the order of the result rows
+    X, y : training matrix and labels
+    cv : number of folds or a splitter, as for cross_val_score (stratified for classifiers)
+    scoring : scorer(estimator, X, y), e.g. from make_scorer
+    n_workers (int) : processes, defaults to the number of cores
+    cache_dir (str) : every fold score is stored as a small json, keyed by the hash of the model's class and
+                      parameters, the data, the folds, the scoring and the fold number; None disables the cache
+
+    Only the folds missing from the cache are fit, so adding a model to the zoo only computes that model.
+    Workers are forked; without fork the fits run one after another in this process.
+    Returns a results table with one row per model: model, cv_mean, cv_std, n_folds, fit_time (total seconds
+    spent fitting, cached folds included) and n_cached (folds read from the cache).
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    splitter = check_cv(cv, y, classifier=any(is_classifier(model) for model in models.values()))
+    folds = list(splitter.split(X, y))
+    data_key = data_hash(X, y)
+    cv_key = hashlib.sha1(f"{splitter!r}|{scoring!r}".encode()).hexdigest()
+
+    scores = {name: [None] * len(folds) for name in models}
+    fit_times = {name: [0.0] * len(folds) for name in models}
+    n_cached = dict.fromkeys(models, 0)
+    tasks = []
+    for name, model in models.items():
+        for fold in range(len(folds)):
+            path = cache_dir and _cache_path(cache_dir, name, model, data_key, cv_key, fold)
+            if path and os.path.exists(path):
+                with open(path) as f:
+                    entry = json.load(f)
+                scores[name][fold], fit_times[name][fold] = entry["score"], entry["fit_time"]
+                n_cached[name] += 1
+            else:
+                tasks.append((name, fold, model, path))
+
+    if tasks:
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        if not can_fork():
+            _data.update(X=X, y=y, scoring=scoring)
+        n_workers = n_workers or min(len(tasks), os.cpu_count() or 1)
+        with fork_pool(n_workers, _init_worker, (X, y, scoring), name="model zoo") as executor:
+            futures = {executor.submit(_fit_score, name, fold, model, *folds[fold]): path
+                       for name, fold, model, path in tasks}
+            for future in as_completed(futures):
+                name, fold, score, fit_time = future.result()
+                scores[name][fold], fit_times[name][fold] = score, fit_time
+                if futures[future]:
+                    with open(futures[future], "w") as f:
+                        json.dump({"model": name, "fold": fold, "score": score, "fit_time": fit_time}, f)
+        _data.clear()
+
+    results = pd.DataFrame({"model": list(models),
+                            "cv_mean": [np.mean(scores[name]) for name in models],
+                            "cv_std": [np.std(scores[name]) for name in models],
+                            "n_folds": len(folds),
+                            "fit_time": [np.sum(fit_times[name]) for name in models],
+                            "n_cached": [n_cached[name] for name in models]})
+    return results.astype(RESULT_DTYPES)
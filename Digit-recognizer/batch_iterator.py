@@ -0,0 +1,41 @@
+import numpy as np
+
+
+class BatchIterator:
+    """
+    Shuffled mini-batches of (images, labels) for feed_dict training.
+    Only an index permutation is shuffled each epoch; every batch is gathered from the (uint8, possibly
+    memory-mapped) arrays into preallocated buffers and scaled in place, so the yielded arrays are only
+    valid until the next batch is requested.
+
+    images : (N, ...) array, labels : (N, ...) array
+    batch_size (int) : rows per batch, the last incomplete batch of an epoch is dropped
+    scale (float) : applied to the images while converting them to float32
+    """
+
+    def __init__(self, images, labels, batch_size=100, scale=1 / 255, seed=None):
+        assert batch_size <= len(images)
+        self.images = images
+        self.labels = labels
+        self.batch_size = batch_size
+        self.scale = scale
+        self.rng = np.random.RandomState(seed)
+        self.order = np.arange(len(images))
+
+        self._raw = np.empty((batch_size,) + images.shape[1:], dtype=images.dtype)
+        self._images = np.empty((batch_size,) + images.shape[1:], dtype=np.float32)
+        self._labels = np.empty((batch_size,) + labels.shape[1:], dtype=labels.dtype)
+
+    def __len__(self):
+        return len(self.order) // self.batch_size
+
+    def __iter__(self):
+        """One epoch of batches."""
+        self.rng.shuffle(self.order)
+        for start in range(0, len(self) * self.batch_size, self.batch_size):
+            # sorted rows keep reads from a memmap sequential, the batch content is the same
+            rows = np.sort(self.order[start:start + self.batch_size])
+            np.take(self.images, rows, axis=0, out=self._raw)
+            np.multiply(self._raw, self.scale, out=self._images, casting="unsafe")
+            np.take(self.labels, rows, axis=0, out=self._labels)
+            yield self._images, self._labels
@@ -1,17 +1,38 @@
+import sys
 import numpy as np
-import pandas as pd
 import tensorflow as tf
 
 from sklearn.model_selection import train_test_split
 from keras.utils.np_utils import to_categorical
 
+sys.path.append("..")
+from common import load_pixel_csv
+from batch_iterator import BatchIterator
+from input_pipeline import InputPipeline
+from submission import write_submission
+
+# shuffle / batch / prefetch inside the graph with tf.data instead of feeding numpy batches
+USE_PIPELINE = True
+ENSEMBLE_SIZE = 3
+
 
 class Model:
-    def __init__(self, name, activation_fn=tf.nn.relu, optimizer_fn=tf.train.AdamOptimizer, learning_rate=0.001):
+    def __init__(self, name, activation_fn=tf.nn.relu, optimizer_fn=tf.train.AdamOptimizer, learning_rate=0.001,
+                 inputs=None):
+        """
+        inputs (InputPipeline) : optional, the model then trains on the pipeline's batches without a feed_dict;
+                                 X, Y and is_training can still be fed, e.g. for evaluation
+        """
+        self.pipeline = inputs
         with tf.name_scope(name):
-            self.X = tf.placeholder(tf.float32, [None, 28, 28, 1], name="X")
-            self.Y = tf.placeholder(tf.float32, [None, 10], name="Y")
-            self.is_training = tf.placeholder(tf.bool, name="is_training")
+            if inputs is None:
+                self.X = tf.placeholder(tf.float32, [None, 28, 28, 1], name="X")
+                self.Y = tf.placeholder(tf.float32, [None, 10], name="Y")
+                self.is_training = tf.placeholder(tf.bool, name="is_training")
+            else:
+                self.X = tf.placeholder_with_default(inputs.X, [None, 28, 28, 1], name="X")
+                self.Y = tf.placeholder_with_default(inputs.Y, [None, 10], name="Y")
+                self.is_training = tf.placeholder_with_default(True, [], name="is_training")
 
             self.L1 = tf.layers.conv2d(self.X, 32, [3, 3], activation=activation_fn)
             self.L1 = tf.layers.max_pooling2d(self.L1, [2, 2], [2, 2])
@@ -30,83 +51,93 @@ class Model:
             self.cost = tf.reduce_mean(tf.nn.softmax_cross_entropy_with_logits_v2(logits=self.model, labels=self.Y))
             self.optimizer = optimizer_fn(learning_rate).minimize(self.cost)
 
-
-def train(sess, model):
-    BATCH_SIZE = 100
-    total_batch = int(len(X_train) / BATCH_SIZE)
-
-    epochs_completed = 0
-    index_in_epoch = 0
-    num_examples = X_train.shape[0]
-
-    for epoch in range(15):
-        total_cost = 0
-
-        for i in range(total_batch):
-            batch_xs, batch_ys = next_batch(BATCH_SIZE)
-            # batch_xs = batch_xs(-1, 28, 28, 1)
-
-            _, cost_val = sess.run([optimizer, cost], feed_dict={X: batch_xs, Y: batch_ys, is_training: True})
-            total_cost += cost_val
-
-        print(f"Epoch: {epoch+1} Avg. cost = {(total_cost / total_batch):.3f}")
-
-    print("==== End ====")
-
-
-def predict(sess, model):
-    is_correct = tf.equal(tf.argmax(model, 1), tf.argmax(Y, 1))
-    accuracy = tf.reduce_mean(tf.cast(is_correct, tf.float32))
-    print(f"정확도: {sess.run(accuracy, feed_dict={X: X_val, Y: Y_val, is_training: False}):.3f}")
-
-
-# serve data by batches
-def next_batch(batch_size):
-    global X_train
-    global Y_train
-    global index_in_epoch
-    global epochs_completed
-
-    start = index_in_epoch
-    index_in_epoch += batch_size
-
-    # when all trainig data have been already used, it is reorder randomly
-    if index_in_epoch > num_examples:
-        # finished epoch
-        epochs_completed += 1
-        # shuffle the data
-        perm = np.arange(num_examples)
-        np.random.shuffle(perm)
-        X_train = X_train[perm]
-        Y_train = Y_train[perm]
-        # start next epoch
-        start = 0
-        index_in_epoch = batch_size
-        assert batch_size <= num_examples
-    end = index_in_epoch
-    return X_train[start:end], Y_train[start:end]
+            # evaluation ops are built once with the model
+            self.prob = tf.nn.softmax(self.model)
+            self.is_correct = tf.equal(tf.argmax(self.model, 1), tf.argmax(self.Y, 1))
+            self.accuracy = tf.reduce_mean(tf.cast(self.is_correct, tf.float32))
+
+    def feed(self, xs, ys=None, is_training=False):
+        feed_dict = {self.X: xs, self.is_training: is_training}
+        if ys is not None:
+            feed_dict[self.Y] = ys
+        return feed_dict
+
+
+class Ensemble:
+    """
+    N Models in one graph, trained together: one sess.run per batch runs every model's training op on the
+    same batch, so the input cost (numpy gathering or the tf.data pipeline) is paid once for all of them.
+    """
+
+    def __init__(self, names, inputs=None, **model_kwargs):
+        self.models = [Model(name, inputs=inputs, **model_kwargs) for name in names]
+        self.pipeline = inputs
+        with tf.name_scope("ensemble"):
+            self.prob = tf.add_n([model.prob for model in self.models]) / len(self.models)
+
+    def feed(self, xs, ys=None, is_training=False):
+        feed_dict = {}
+        for model in self.models:
+            feed_dict.update(model.feed(xs, ys, is_training))
+        return feed_dict
+
+    def train(self, sess, batches=None, epochs=15):
+        """batches (BatchIterator) : fed through feed_dict, None for models built on an InputPipeline"""
+        ops = [[model.optimizer for model in self.models], [model.cost for model in self.models]]
+        total_batch = len(batches) if batches is not None else self.pipeline.steps_per_epoch
+
+        for epoch in range(epochs):
+            total_cost = np.zeros(len(self.models))
+
+            if batches is None:
+                for i in range(total_batch):
+                    total_cost += sess.run(ops)[1]
+            else:
+                for batch_xs, batch_ys in batches:
+                    total_cost += sess.run(ops, feed_dict=self.feed(batch_xs, batch_ys, is_training=True))[1]
+
+            costs = " ".join(f"{cost:.3f}" for cost in total_cost / total_batch)
+            print(f"Epoch: {epoch+1} Avg. cost = {costs}")
+
+        print("==== End ====")
+
+    def evaluate(self, sess, images, labels, batch_size=1000):
+        """Accuracy of every model and of the averaged prediction."""
+        correct = np.zeros(len(self.models) + 1)
+        ops = [[model.is_correct for model in self.models], self.prob]
+        for start in range(0, len(images), batch_size):
+            ys = labels[start:start + batch_size]
+            is_correct, prob = sess.run(ops, feed_dict=self.feed(images[start:start + batch_size] / 255.0, ys))
+            correct[:-1] += np.sum(is_correct, axis=1)
+            correct[-1] += np.sum(prob.argmax(1) == ys.argmax(1))
+        return correct / len(images)
 
 
 if __name__ == "__main__":
-    train = pd.read_csv("./data/train.csv")
-    test = pd.read_csv("./data/test.csv")
-
-    Y_train = train["label"]
-    X_train = train.drop(["label"], axis=1)
+    train_data = load_pixel_csv("./data/train.csv")
+    test_data = load_pixel_csv("./data/test.csv")
 
-    del train
-
-    X_train = X_train / 255.0
-    test = test / 255.0
-
-    X_train = X_train.values.reshape(-1, 28, 28, 1)
-    test = test.values.reshape(-1, 28, 28, 1)
-
-    Y_train = to_categorical(Y_train, num_classes=10)
+    # images stay uint8, they are scaled to [0, 1] batch by batch
+    X_train = train_data["images"]
+    Y_train = to_categorical(train_data["labels"], num_classes=10)
 
     X_train, X_val, Y_train, Y_val = train_test_split(X_train, Y_train, test_size=0.1, random_state=2)
 
-    bn = Model('bn')
+    if USE_PIPELINE:
+        pipeline = InputPipeline(X_train, Y_train, batch_size=100, seed=2)
+        batches = None
+    else:
+        pipeline = None
+        batches = BatchIterator(X_train, Y_train, batch_size=100, seed=2)
+    ensemble = Ensemble([f"model_{i}" for i in range(ENSEMBLE_SIZE)], inputs=pipeline)
 
     with tf.Session() as sess:
         sess.run(tf.global_variables_initializer())
+        if USE_PIPELINE:
+            pipeline.initialize(sess)
+        ensemble.train(sess, batches)
+
+        accuracy = ensemble.evaluate(sess, X_val, Y_val)
+        print("정확도: " + " ".join(f"{a:.3f}" for a in accuracy[:-1]) + f", ensemble {accuracy[-1]:.3f}")
+
+        write_submission(sess, ensemble, test_data["images"], "./data/submission.csv")
@@ -0,0 +1,35 @@
+import numpy as np
+import tensorflow as tf
+
+
+class InputPipeline:
+    """
+    In-graph shuffling, batching, scaling and prefetching of (images, labels) with tf.data.
+    The arrays (uint8 images, possibly memory-mapped) are fed once, when the iterator is initialized;
+    the dataset then repeats with a new shuffle every epoch, so training steps need no feed_dict.
+
+    X, Y : float32 batch tensors, to pass as `Model(..., inputs=pipeline)`
+    steps_per_epoch (int) : number of full batches in one pass over the data
+    """
+
+    def __init__(self, images, labels, batch_size=100, scale=1 / 255, seed=None, prefetch=2, name="input"):
+        self.images = images
+        self.labels = labels
+        self.steps_per_epoch = len(images) // batch_size
+
+        with tf.name_scope(name):
+            self.images_in = tf.placeholder(tf.as_dtype(images.dtype), (None,) + images.shape[1:], name="images")
+            self.labels_in = tf.placeholder(tf.as_dtype(labels.dtype), (None,) + labels.shape[1:], name="labels")
+
+            dataset = tf.data.Dataset.from_tensor_slices((self.images_in, self.labels_in))
+            dataset = dataset.shuffle(len(images), seed=seed, reshuffle_each_iteration=True).repeat()
+            dataset = dataset.batch(batch_size)
+            dataset = dataset.map(lambda x, y: (tf.cast(x, tf.float32) * scale, tf.cast(y, tf.float32)))
+            dataset = dataset.prefetch(prefetch)
+
+            self.iterator = dataset.make_initializable_iterator()
+            self.X, self.Y = self.iterator.get_next()
+
+    def initialize(self, sess):
+        sess.run(self.iterator.initializer,
+                 feed_dict={self.images_in: np.asarray(self.images), self.labels_in: np.asarray(self.labels)})
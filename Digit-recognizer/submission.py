@@ -0,0 +1,39 @@
+import time
+import numpy as np
+
+
+def predict_batches(sess, predictor, images, batch_size=1000, scale=1 / 255):
+    """
+    Yields (start, probabilities) over uint8 images in fixed-size batches.
+    predictor : a Model or an Ensemble, with a `prob` op and a `feed(xs)` method
+    The float32 input batch is converted into one reusable buffer.
+    """
+    buffer = np.empty((batch_size,) + images.shape[1:], dtype=np.float32)
+    for start in range(0, len(images), batch_size):
+        xs = buffer[:min(batch_size, len(images) - start)]
+        np.multiply(images[start:start + len(xs)], scale, out=xs, casting="unsafe")
+        yield start, sess.run(predictor.prob, feed_dict=predictor.feed(xs))
+
+
+def predict_proba(sess, predictor, images, batch_size=1000):
+    prob = np.empty((len(images), 10), dtype=np.float32)
+    for start, batch in predict_batches(sess, predictor, images, batch_size):
+        prob[start:start + len(batch)] = batch
+    return prob
+
+
+def write_submission(sess, predictor, images, path="./data/submission.csv", batch_size=1000):
+    """
+    Streams the test images through the predictor and writes `ImageId,Label` rows (1-based ids, as in
+    data/sample_submission.csv). Returns the throughput in images / sec.
+    """
+    begin = time.perf_counter()
+    with open(path, "w") as f:
+        f.write("ImageId,Label\n")
+        for start, prob in predict_batches(sess, predictor, images, batch_size):
+            f.writelines(f"{start + i + 1},{label}\n" for i, label in enumerate(prob.argmax(axis=1)))
+    elapsed = time.perf_counter() - begin
+
+    rate = len(images) / elapsed
+    print(f"{len(images)} images predicted in {elapsed:.1f}s ({rate:.0f} images/sec) -> {path}")
+    return rate
@@ -0,0 +1,42 @@
+import numpy as np
+
+from keras.utils import Sequence, to_categorical
+
+
+class Uint8Sequence(Sequence):
+    """
+    Keras Sequence over uint8 images (in memory or memory-mapped) and integer labels.
+    Each batch is gathered, converted to float32 and scaled on the fly, with labels one-hot encoded per
+    batch, so only uint8 data stays resident. Batches are independent of each other and can be built by
+    several fit_generator workers.
+
+    indices : optional subset of rows (e.g. a train / validation split), all rows by default
+    shuffle (bool) : reshuffle the rows at the end of every epoch
+    """
+
+    def __init__(self, images, labels, batch_size=256, num_classes=10, indices=None, scale=1 / 255, shuffle=True,
+                 seed=None):
+        self.images = images
+        self.labels = labels
+        self.batch_size = batch_size
+        self.num_classes = num_classes
+        self.scale = scale
+        self.shuffle = shuffle
+        self.rng = np.random.RandomState(seed)
+        self.order = np.arange(len(images)) if indices is None else np.asarray(indices).copy()
+        if shuffle:
+            self.rng.shuffle(self.order)
+
+    def __len__(self):
+        return int(np.ceil(len(self.order) / self.batch_size))
+
+    def __getitem__(self, i):
+        # sorted rows keep reads from a memmap sequential
+        rows = np.sort(self.order[i * self.batch_size:(i + 1) * self.batch_size])
+        x = self.images[rows].astype(np.float32)
+        x *= self.scale
+        return x, to_categorical(self.labels[rows], self.num_classes)
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
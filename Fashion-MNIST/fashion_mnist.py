@@ -1,44 +1,39 @@
+import sys
 import keras
 import numpy as np
-import pandas as pd
 
 from subprocess import check_output
-from keras.utils import to_categorical
 from keras.models import Sequential
 from keras.layers import Dense, Dropout, Flatten
 from keras.layers import Conv2D, MaxPooling2D
 from sklearn.model_selection import train_test_split
 
+sys.path.append("..")
+from common import load_pixel_csv
+from batch_sequence import Uint8Sequence
+
 print(check_output(["ls", "../input"]).decode("utf8"))
 
-data_train = pd.read_csv("../input/fashion-mnist_train.csv")
-data_test = pd.read_csv("../input/fashion-mnist_test.csv")
+data_train = load_pixel_csv("../input/fashion-mnist_train.csv")
+data_test = load_pixel_csv("../input/fashion-mnist_test.csv")
 
 img_rows, img_cols = 28, 28
 input_shape = (img_rows, img_cols, 1)
 
-X = np.array(data_train.iloc[:, 1:])
-y = to_categorical(np.array(data_train.iloc[:, 0]))
-
-X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=13)
-
-X_test = np.array(data_test.iloc[:, 1:])
-y_test = to_categorical(np.array(data_test.iloc[:, 0]))
+# images stay uint8 (memory-mapped), batches are converted to float32 by the Sequence workers
+X = data_train["images"]
+y = data_train["labels"]
 
-X_train = X_train.reshape(X_train.shape[0], img_rows, img_cols, 1)
-X_test = X_test.reshape(X_test.shape[0], img_rows, img_cols, 1)
-X_val = X_val.reshape(X_val.shape[0], img_rows, img_cols, 1)
-
-X_train = X_train.astype("float32")
-X_test = X_test.astype("float32")
-X_val = X_val.astype("float32")
-X_train /= 255
-X_test /= 255
-X_val /= 255
+train_idx, val_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=13)
 
 batch_size = 256
 num_classes = 10
 epochs = 50
+workers = 4
+
+train_batches = Uint8Sequence(X, y, batch_size, num_classes, indices=train_idx, seed=13)
+val_batches = Uint8Sequence(X, y, batch_size, num_classes, indices=val_idx, shuffle=False)
+test_batches = Uint8Sequence(data_test["images"], data_test["labels"], batch_size, num_classes, shuffle=False)
 
 img_rows, img_cols = 28, 28
 
@@ -65,12 +60,12 @@ model.compile(loss=keras.losses.categorical_crossentropy,
 
 model.summary()
 
-history = model.fit(X_train, y_train,
-                    batch_size=batch_size,
-                    epochs=epochs,
-                    verbose=1,
-                    validation_data=(X_val, y_val))
-score = model.evaluate(X_test, y_test, verbose=0)
+history = model.fit_generator(train_batches,
+                              epochs=epochs,
+                              verbose=1,
+                              validation_data=val_batches,
+                              workers=workers)
+score = model.evaluate_generator(test_batches, workers=workers)
 
 print('Test loss:', score[0])
 print('Test accuracy:', score[1])
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+
+class FeatureCrosser:
+    """
+    Interaction features between categorical-like columns, built from integer codes.
+    Every input column is factorized once over train + test; a cross of any number of columns combines the
+    codes arithmetically (code1 * card2 + code2) and remaps the result densely, so no string is ever built.
+
+    nan_as_category (bool) : treat missing values as a category of their own (like str(nan) == "nan"),
+                             otherwise rows with a missing input get -1
+    """
+
+    def __init__(self, train_df, test_df, nan_as_category=True):
+        self.train_df = train_df
+        self.test_df = test_df
+        self.nan_as_category = nan_as_category
+        self.n_train = len(train_df)
+        self._codes = {}
+
+    def _column_codes(self, f):
+        if f not in self._codes:
+            values = np.concatenate([self.train_df[f].values, self.test_df[f].values])
+            codes, uniques = pd.factorize(values, sort=True)
+            card = len(uniques)
+            if self.nan_as_category and (codes < 0).any():
+                codes[codes < 0] = card
+                card += 1
+            self._codes[f] = codes.astype(np.int64), card
+        return self._codes[f]
+
+    def cross(self, columns):
+        """
+        Dense integer codes of the cross of `columns` (any arity).
+        Returns (train_codes, test_codes).
+        """
+        codes, _ = self._column_codes(columns[0])
+        missing = codes < 0
+        for f in columns[1:]:
+            other, other_card = self._column_codes(f)
+            missing |= other < 0
+            codes, _ = pd.factorize(np.maximum(codes, 0) * other_card + np.maximum(other, 0), sort=True)
+
+        if missing.any():
+            crossed = np.full(len(codes), -1, dtype=np.int64)
+            crossed[~missing] = pd.factorize(codes[~missing], sort=True)[0]
+            codes = crossed
+        return codes[:self.n_train], codes[self.n_train:]
+
+    def add_crosses(self, combs, sep="_plus_"):
+        """
+        Adds one column per tuple of `combs` to train_df and test_df, named by joining the inputs with `sep`.
+        Returns the list of new column names.
+        """
+        names = []
+        for comb in combs:
+            name = sep.join(comb)
+            self.train_df[name], self.test_df[name] = self.cross(list(comb))
+            names.append(name)
+        return names
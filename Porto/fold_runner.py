@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from concurrent.futures import as_completed
+
+from common.process_pool import can_fork, fork_pool
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]
+
+_shared = {}
+_n_threads = 1
+
+
+def share_arrays(arrays, directory):
+    """Writes every array to `directory` as .npy so that workers can memory-map it read-only."""
+    paths = {}
+    for name, values in arrays.items():
+        paths[name] = os.path.join(directory, name + ".npy")
+        np.save(paths[name], np.ascontiguousarray(values))
+    return paths
+
+
+def _init_worker(paths, n_threads):
+    global _n_threads
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(n_threads)
+    if threadpool_limits is not None:
+        threadpool_limits(n_threads)
+    _n_threads = n_threads
+    for name, path in paths.items():
+        _shared[name] = np.load(path, mmap_mode="r")
+
+
+def _run_fold(fold_fn, fold, train_index, valid_index):
+    valid_pred, test_pred = fold_fn(_shared, fold, train_index, valid_index, _n_threads)
+    return fold, valid_pred, test_pred
+
+
+def run_folds(fold_fn, arrays, folds, n_test, n_workers=None, threads_per_worker=None, tmp_dir=None):
+    """
+    Runs the folds of a K-fold loop in a process pool.
+    fold_fn : fold_fn(shared, fold, train_index, valid_index, n_threads) -> (valid_pred, test_pred),
+              where `shared` maps the names of `arrays` to read-only memmaps
+    arrays : dict of arrays shared with the workers (feature matrix, target, test matrix ...)
+    folds : list of (train_index, valid_index) pairs
+    n_test (int) : number of test rows returned by fold_fn
+    n_workers (int) : processes running folds at once, defaults to the number of folds (capped by cores)
+    threads_per_worker (int) : thread budget of each worker, defaults to cores // n_workers
+
+    The arrays are written once to a temporary directory and memory-mapped by the workers instead of
+    being pickled for every fold. Workers are forked so that fold_fn may be defined in the calling script;
+    without fork the folds run one after another in this process, with all cores and the plain arrays.
+    Returns the out-of-fold predictions and the test predictions averaged over folds.
+    """
+    global _n_threads
+    n_cores = os.cpu_count() or 1
+    n_workers = n_workers or min(len(folds), n_cores)
+    threads_per_worker = threads_per_worker or max(1, n_cores // n_workers)
+    n_train = sum(len(valid_index) for _, valid_index in folds)
+
+    oof_pred = np.zeros(n_train)
+    test_pred = np.zeros((len(folds), n_test))
+
+    directory = tempfile.mkdtemp(prefix="folds_", dir=tmp_dir)
+    try:
+        if can_fork():
+            paths = share_arrays(arrays, directory)
+        else:
+            paths = None
+            _shared.update(arrays)
+            _n_threads = n_cores
+        with fork_pool(n_workers, _init_worker, (paths, threads_per_worker), name="folds") as executor:
+            futures = [executor.submit(_run_fold, fold_fn, fold, train_index, valid_index)
+                       for fold, (train_index, valid_index) in enumerate(folds)]
+            for future in as_completed(futures):
+                fold, valid_pred, fold_test_pred = future.result()
+                oof_pred[folds[fold][1]] = valid_pred
+                test_pred[fold] = fold_test_pred
+    finally:
+        _shared.clear()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return oof_pred, test_pred.mean(axis=0)
@@ -0,0 +1,91 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _rank_sums_numpy(y_sorted, p_sorted):
+    """
+    Sum of the (1-based, tie-averaged) ranks of the positives in every row.
+    y_sorted / p_sorted : (m, n) labels and predictions, each row sorted by prediction
+    """
+    m, n = p_sorted.shape
+    idx = np.broadcast_to(np.arange(n), (m, n))
+    starts = np.ones((m, n), dtype=bool)
+    starts[:, 1:] = p_sorted[:, 1:] != p_sorted[:, :-1]
+    ends = np.ones((m, n), dtype=bool)
+    ends[:, :-1] = starts[:, 1:]
+
+    first = np.maximum.accumulate(np.where(starts, idx, 0), axis=1)
+    last = np.minimum.accumulate(np.where(ends, idx, n - 1)[:, ::-1], axis=1)[:, ::-1]
+    return (((first + last) / 2 + 1) * y_sorted).sum(axis=1)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _rank_sums_numba(y_sorted, p_sorted):
+        m, n = p_sorted.shape
+        out = np.zeros(m)
+        for r in range(m):
+            i = 0
+            while i < n:
+                j = i
+                positives = 0.0
+                while j < n and p_sorted[r, j] == p_sorted[r, i]:
+                    positives += y_sorted[r, j]
+                    j += 1
+                out[r] += positives * ((i + j - 1) / 2 + 1)
+                i = j
+        return out
+
+    _rank_sums = _rank_sums_numba
+else:
+    _rank_sums = _rank_sums_numpy
+
+
+def auc_scores(y_true, preds, chunk_rows=64):
+    """
+    ROC AUC of every row of `preds` against the same binary labels, with ties scored as half a pair.
+    y_true : (n,) binary labels
+    preds : (n,) or (m, n) candidate predictions (folds x rounds, blend weights, models ...)
+    chunk_rows (int) : rows sorted at once, bounds the temporary (chunk_rows, n) arrays
+
+    One argsort per row plus cumulative scans over the sorted labels (Mann-Whitney U with midranks).
+    Returns a float for 1-D preds and an (m,) array otherwise.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    preds = np.asarray(preds)
+    single = preds.ndim == 1
+    preds = np.atleast_2d(preds)
+
+    n_pos = y_true.sum()
+    n_neg = len(y_true) - n_pos
+    scores = np.empty(preds.shape[0])
+    for start in range(0, preds.shape[0], chunk_rows):
+        block = preds[start:start + chunk_rows]
+        order = np.argsort(block, axis=1, kind="mergesort")
+        p_sorted = np.take_along_axis(block, order, axis=1)
+        rank_sum = _rank_sums(y_true[order], p_sorted)
+        scores[start:start + chunk_rows] = (rank_sum - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+
+    return scores[0] if single else scores
+
+
+def gini_scores(y_true, preds, chunk_rows=64):
+    """Normalized Gini (2 * AUC - 1) of every row of `preds`, see `auc_scores`."""
+    return 2 * auc_scores(y_true, preds, chunk_rows) - 1
+
+
+def eval_gini(y_true, y_prob):
+    return gini_scores(y_true, y_prob)
+
+
+def blend_gini(y_true, base_preds, weights, chunk_rows=64):
+    """
+    Gini of many blends at once.
+    base_preds : (k, n) predictions of the k blended models
+    weights : (m, k) candidate blend weights
+    """
+    return gini_scores(y_true, np.asarray(weights) @ np.asarray(base_preds), chunk_rows)
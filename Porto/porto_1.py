@@ -9,6 +9,7 @@
 기법이 발견되길 기대하고 있다. 보다 정확한 예측 모델은 운전자에게 합리적인 가격을 제공하고, 더 많은 운전자들이 자동차 보험의 혜택을
 받을 수 있게 도와줄 것이다.
 """
+import sys
 import warnings
 import numpy as np
 import pandas as pd
@@ -23,10 +24,16 @@ from sklearn.preprocessing import PolynomialFeatures
 from sklearn.feature_selection import SelectFromModel
 from sklearn.feature_selection import VarianceThreshold
 
+sys.path.append("..")
+from common import cached_frame
+from porto_data import read_meta, read_compact
+from target_encoding import TargetEncoder
+
 warnings.filterwarnings('ignore')
 
-train = pd.read_csv('./data/train.csv')
-test = pd.read_csv('./data/test.csv')
+meta = read_meta('./data/train.csv', './data/test.csv')
+train = cached_frame('./data/train.csv', read_compact, meta, missing_as_na=False)
+test = cached_frame('./data/test.csv', read_compact, meta, missing_as_na=False)
 
 # print(train.shape)
 # print(train.columns)
@@ -34,46 +41,6 @@ test = pd.read_csv('./data/test.csv')
 # print(train.info())
 # print(train.isnull().sum())
 
-data = []
-for f in train.columns:
-    # Defining the role
-    if f == 'target':
-        role = 'target'
-    elif f == 'id':
-        role = 'id'
-    else:
-        role = 'input'
-
-    # Defining the data type
-    dtype = train[f].dtype
-
-    # Defining the level
-    if 'bin' in f or f == 'target':
-        level = 'binary'
-    elif 'cat' in f or f == 'id':
-        level = 'nominal'
-    elif dtype == 'int64':
-        level = 'ordinal'
-    elif dtype == 'float64':
-        level = 'interval'
-
-    # Initialize keep to True for all variables except for id
-    keep = True
-    if f == 'id':
-        keep = False
-
-    # Creating a Dict that contains all the metadata for the variable
-    f_dict = {
-        'varname': f,
-        'role': role,
-        'level': level,
-        'keep': keep,
-        'dtype': dtype
-    }
-    data.append(f_dict)
-
-meta = pd.DataFrame(data, columns=['varname', 'role', 'level', 'keep', 'dtype'])
-meta.set_index('varname', inplace=True)
 # print(meta)
 
 # print(meta[(meta.level == 'nominal') & (meta.keep)].index)
@@ -135,57 +102,13 @@ for f in v:
     # print(f"Variable {f} has {dist_values} distinct values")
 
 
-def add_noise(series, noise_level):
-    return series * (1 + noise_level * np.random.randn(len(series)))
-
-
-def target_encode(trn_series=None, tst_series=None, target=None, min_samples_leaf=1, smoothing=1, noise_level=0):
-    """
-    Smoothing is computed like in the following paper by Daniele Micci-Barreca
-    https://kaggle2.blob.core.windows.net/forum-message-attachments/225952/7441/high%20cardinality%20categoricals.pdf
-    trn_series : training categorical feature as a pd.Series
-    tst_series : test categorical feature as a pd.Series
-    target : target data as a pd.Series
-    min_samples_leaf (int) : minimum samples to take category average into account
-    smoothing (int) : smoothing effect to balance categorical average vs prior
-    """
-    assert len(trn_series) == len(target)
-    assert trn_series.name == tst_series.name
-    temp = pd.concat([trn_series, target], axis=1)
-
-    averages = temp.groupby(by=trn_series.name)[target.name].agg(['mean', 'count'])
-    smoothing = 1 / (1 + np.exp(-(averages['count'] - min_samples_leaf) / smoothing))
-    prior = target.mean()
-
-    averages[target.name] = prior * (1 - smoothing) + averages['mean'] * smoothing
-    averages.drop(['mean', 'count'], axis=1, inplace=True)
-
-    ft_trn_series = pd.merge(trn_series.to_frame(trn_series.name),
-                             averages.reset_index().rename(columns={'index': target.name, target.name: 'average'}),
-                             on=trn_series.name,
-                             how='left')['average'].rename(trn_series.name + '_mean').fillna(prior)
-    ft_trn_series.index = trn_series.index
-
-    ft_tst_series = pd.merge(tst_series.to_frame(tst_series.name),
-                             averages.reset_index().rename(columns={'index': target.name, target.name: 'average'}),
-                             on=tst_series.name,
-                             how='left')['average'].rename(trn_series.name + '_mean').fillna(prior)
-    ft_tst_series.index = tst_series.index
-
-    return add_noise(ft_trn_series, noise_level), add_noise(ft_tst_series, noise_level)
-
-
-train_encoded, test_encoded = target_encode(train['ps_car_11_cat'],
-                                            test['ps_car_11_cat'],
-                                            target=train.target,
-                                            min_samples_leaf=100,
-                                            smoothing=10,
-                                            noise_level=0.01)
+encoder = TargetEncoder(min_samples_leaf=100, smoothing=10, noise_level=0.01)
+train_encoded, test_encoded = encoder.fit(train, test, ['ps_car_11_cat']).transform(train.target)
 
-train['ps_car_11_cat_te'] = train_encoded
+train['ps_car_11_cat_te'] = train_encoded[:, 0]
 train.drop('ps_car_11_cat', axis=1, inplace=True)
 meta.loc['ps_car_11_cat', 'keep'] = False
-test['ps_car_11_cat_te'] = test_encoded
+test['ps_car_11_cat_te'] = test_encoded[:, 0]
 test.drop('ps_car_11_cat', axis=1, inplace=True)
 
 v = meta[(meta.level == 'nominal') & meta.keep].index
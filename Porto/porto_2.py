@@ -1,3 +1,4 @@
+import sys
 import re
 import warnings
 import numpy as np
@@ -18,10 +19,13 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.feature_selection import mutual_info_classif
 
+sys.path.append("..")
+from common import read_csv
+
 warnings.filterwarnings('ignore')
 
-train = pd.read_csv('./data/train.csv')
-test = pd.read_csv('./data/test.csv')
+train = read_csv('./data/train.csv')
+test = read_csv('./data/test.csv')
 
 rows = train.shape[0]
 columns = train.shape[1]
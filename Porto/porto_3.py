@@ -1,33 +1,26 @@
+import sys
 import time
 import numpy as np
 import pandas as pd
 
-from numba import jit
 from xgboost import XGBClassifier
-from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import KFold
 
+sys.path.append("..")
+from common import cached_frame
+from gini import eval_gini
+from porto_data import read_meta, read_compact
+from fold_runner import run_folds
+from feature_cross import FeatureCrosser
+from target_encoding import TargetEncoder, fold_ids_from_splits
+
 MAX_ROUNDS = 400
 OPTIMIZE_ROUNDS = False
 LEARNING_RATE = 0.07
 EARLY_STOPPING_ROUNDS = 50
-
-
-@jit
-def eval_gini(y_true, y_prob):
-    y_true = np.asarray(y_true)
-    y_true = y_true[np.argsort(y_prob)]
-    ntrue = 0
-    gini = 0
-    delta = 0
-    n = len(y_true)
-    for i in range(n - 1, -1, -1):
-        y_i = y_true[i]
-        ntrue += y_i
-        gini += y_i * delta
-        delta += 1 - y_i
-    gini = 1 - 2 * gini / (ntrue * (n - ntrue))
-    return gini
+NESTED_ENCODING = False
+N_WORKERS = None
+THREADS_PER_WORKER = None
 
 
 def gini_xgb(preds, dtrain):
@@ -36,41 +29,9 @@ def gini_xgb(preds, dtrain):
     return [("gini", gini_score)]
 
 
-def add_noise(series: object, noise_level: object) -> object:
-    return series * (1 + noise_level * np.random.randn(len(series)))
-
-
-def target_encode(trn_series=None, val_series=None, tst_series=None, target=None,
-                  min_samples_leaf=1, smoothing=1, noise_level=0):
-    assert len(trn_series) == len(target)
-    assert trn_series.name == tst_series.name
-    temp = pd.concat([trn_series, target], axis=1)
-    averages = temp.groupby(by=trn_series.name)[target.name].agg(["mean", "count"])
-    smoothing = 1 / (1 + np.exp(-(averages["count"] - min_samples_leaf) / smoothing))
-    prior = target.mean()
-    averages[target.name] = prior * (1 - smoothing) + averages["mean"] * smoothing
-    averages.drop(["mean", "count"], axis=1, inplace=True)
-    ft_trn_series = pd.merge(trn_series.to_frame(trn_series.name),
-                             averages.reset_index().rename(columns={"index": target.name, target.name: "average"}),
-                             on=trn_series.name,
-                             how="left")["average"].rename(trn_series.name + "_mean").fillna(prior)
-    ft_trn_series.index = trn_series.index
-    ft_val_series = pd.merge(val_series.to_frame(val_series.name),
-                             averages.reset_index().rename(columns={"index": target.name, target.name: "average"}),
-                             on=val_series.name,
-                             how="left")["average"].rename(trn_series.name + "_mean").fillna(prior)
-    ft_val_series.index = val_series.index
-    ft_tst_series = pd.merge(tst_series.to_frame(tst_series.name),
-                             averages.reset_index().rename(columns={"index": target.name, target.name: "average"}),
-                             on=tst_series.name,
-                             how="left")["average"].rename(trn_series.name + "_mean").fillna(prior)
-    ft_tst_series.index = tst_series.index
-    return add_noise(ft_trn_series, noise_level), add_noise(ft_val_series, noise_level), \
-           add_noise(ft_tst_series, noise_level)
-
-
-train_df = pd.read_csv("data/train.csv", na_values="-1")
-test_df = pd.read_csv("data/test.csv", na_values="-1")
+meta = read_meta("data/train.csv", "data/test.csv")
+train_df = cached_frame("data/train.csv", read_compact, meta)
+test_df = cached_frame("data/test.csv", read_compact, meta)
 
 train_features = ["ps_car_13",  # : 1571.65 / shadow  609.23
                   "ps_reg_03",  # : 1408.42 / shadow  511.15
@@ -115,83 +76,71 @@ id_train = train_df["id"].values
 y = train_df["target"]
 
 start = time.time()
-for n_c, (f1, f2) in enumerate(combs):
-    name1 = f1 + "_plus_" + f2
-    print("current featrue %60s %4d in %5.1f" % (name1, n_c + 1, (time.time() - start) / 60), end="")
-    print("\r" * 75, end="")
-    train_df[name1] = train_df[f1].apply(lambda x: str(x)) + "_" + train_df[f2].apply(lambda x: str(x))
-    test_df[name1] = test_df[f1].apply(lambda x: str(x)) + "_" + test_df[f2].apply(lambda x: str(x))
-
-    lbl = LabelEncoder()
-    lbl.fit(list(train_df[name1].values) + list(test_df[name1].values))
-    train_df[name1] = lbl.transform(list(train_df[name1].values))
-    test_df[name1] = lbl.transform(list(test_df[name1].values))
-
-    train_features.append(name1)
+crosser = FeatureCrosser(train_df, test_df)
+train_features += crosser.add_crosses(combs)
+print("%d crossed features in %5.1f s" % (len(combs), time.time() - start))
 
 X = train_df[train_features]
 test_df = test_df[train_features]
 
 f_cats = [f for f in X.columns if "_cat" in f]
-
-y_valid_pred = 0 * y
-y_test_pred = 0
+encoder = TargetEncoder(min_samples_leaf=200, smoothing=10, noise_level=0).fit(X, test_df, f_cats)
 
 K = 5
 kf = KFold(n_splits=K, random_state=1, shuffle=True)
 np.random.seed(0)
-
-model = XGBClassifier(n_estimators=MAX_ROUNDS,
-                      max_depth=4,
-                      objective="binary:logistic",
-                      learning_rate=LEARNING_RATE,
-                      subsample=.8,
-                      min_child_weight=6,
-                      colsample_bytree=.8,
-                      scale_pos_weight=1.6,
-                      gamma=10,
-                      reg_alpha=8,
-                      reg_lambda=1.3)
-
-for i, (train_index, test_index) in enumerate(kf.split(train_df)):
-    y_train, y_valid = y.iloc[train_index].copy(), y.iloc[test_index]
-    X_train, X_valid = X.iloc[train_index, :].copy(), X.iloc[test_index, :].copy()
-    X_test = test_df.copy()
-    print("\nFold", i)
-
-    for f in f_cats:
-        X_train[f + "_avg"], X_valid[f + "_avg"], X_test[f + "_avg"] = target_encode(trn_series=X_train[f],
-                                                                                     val_series=X_valid[f],
-                                                                                     tst_series=X_test[f],
-                                                                                     target=y_train,
-                                                                                     min_samples_leaf=200,
-                                                                                     smoothing=10,
-                                                                                     noise_level=0)
+folds = list(kf.split(train_df))
+encoder.fit_folds(fold_ids_from_splits(folds, len(train_df)), y.values)
+
+model_params = dict(n_estimators=MAX_ROUNDS,
+                    max_depth=4,
+                    objective="binary:logistic",
+                    learning_rate=LEARNING_RATE,
+                    subsample=.8,
+                    min_child_weight=6,
+                    colsample_bytree=.8,
+                    scale_pos_weight=1.6,
+                    gamma=10,
+                    reg_alpha=8,
+                    reg_lambda=1.3)
+
+
+def train_fold(shared, fold, train_index, valid_index, n_threads):
+    trn_avg, val_avg, tst_avg = encoder.transform_split(fold, nested=NESTED_ENCODING)
+    X_train = np.hstack([shared["X"][train_index], trn_avg])
+    X_valid = np.hstack([shared["X"][valid_index], val_avg])
+    X_test = np.hstack([shared["X_test"], tst_avg])
+    y_train, y_valid = shared["y"][train_index], shared["y"][valid_index]
+
+    model = XGBClassifier(n_jobs=n_threads, **model_params)
     if OPTIMIZE_ROUNDS:
         eval_set = [(X_valid, y_valid)]
         fit_model = model.fit(X_train, y_train, eval_set=eval_set, eval_metric=gini_xgb,
                               early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose=False)
-        print("Best N trees = ", model.best_ntree_limit)
-        print("Best gini = ", model.best_score)
+        print(f"Fold {fold} Best N trees = ", model.best_ntree_limit)
+        print(f"Fold {fold} Best gini = ", model.best_score)
     else:
         fit_model = model.fit(X_train, y_train)
 
     pred = fit_model.predict_proba(X_valid)[:, 1]
-    print("Gini = ", eval_gini(y_valid, pred))
-    y_valid_pred.iloc[test_index] = pred
+    print(f"Fold {fold} Gini = ", eval_gini(y_valid, pred))
 
-    y_test_pred += fit_model.predict_proba(X_test)[:, 1]
+    return pred, fit_model.predict_proba(X_test)[:, 1]
 
-    del X_test, X_train, X_valid, y_train
 
-y_test_pred /= K
+shared = {"X": X.to_numpy(dtype=np.float32, na_value=np.nan),
+          "X_test": test_df.to_numpy(dtype=np.float32, na_value=np.nan),
+          "y": y.values}
+y_valid_pred, y_test_pred = run_folds(train_fold, shared, folds, len(test_df),
+                                      n_workers=N_WORKERS, threads_per_worker=THREADS_PER_WORKER)
+del shared
 
 print("\nGini for full training set: ")
 eval_gini(y, y_valid_pred)
 
 val = pd.DataFrame()
 val["id"] = id_train
-val["target"] = y_valid_pred.values
+val["target"] = y_valid_pred
 val.to_csv("data/xgb_valid.csv", float_format="%.6f", index=False)
 
 sub = pd.DataFrame()
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+from common import cached
+
+
+def build_meta(train):
+    """
+    Metadata of every column: role (target / id / input), level (binary / nominal / ordinal / interval),
+    keep and the dtype pandas infers for it.
+    """
+    data = []
+    for f in train.columns:
+        # Defining the role
+        if f == 'target':
+            role = 'target'
+        elif f == 'id':
+            role = 'id'
+        else:
+            role = 'input'
+
+        # Defining the data type
+        dtype = train[f].dtype
+
+        # Defining the level
+        if 'bin' in f or f == 'target':
+            level = 'binary'
+        elif 'cat' in f or f == 'id':
+            level = 'nominal'
+        elif dtype == 'int64':
+            level = 'ordinal'
+        elif dtype == 'float64':
+            level = 'interval'
+
+        # Initialize keep to True for all variables except for id
+        keep = True
+        if f == 'id':
+            keep = False
+
+        # Creating a Dict that contains all the metadata for the variable
+        f_dict = {
+            'varname': f,
+            'role': role,
+            'level': level,
+            'keep': keep,
+            'dtype': dtype
+        }
+        data.append(f_dict)
+
+    meta = pd.DataFrame(data, columns=['varname', 'role', 'level', 'keep', 'dtype'])
+    meta.set_index('varname', inplace=True)
+    return meta
+
+
+def _level(f):
+    """Level given by the column name, None for the plain numeric columns."""
+    if f.endswith('_bin') or f == 'target':
+        return 'binary'
+    if f.endswith('_cat') or f == 'id':
+        return 'nominal'
+    return None
+
+
+def column_stats(path, chunksize=1 << 17):
+    """
+    Per column of a csv, from a chunked pass over the whole file: whether every value is an integer,
+    min and max.
+    """
+    columns, integer, lo, hi = [], {}, {}, {}
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        for f in chunk.columns:
+            if f not in integer:
+                columns.append(f)
+                integer[f], lo[f], hi[f] = True, np.inf, -np.inf
+        integer.update({f: integer[f] and pd.api.types.is_integer_dtype(dtype)
+                        for f, dtype in chunk.dtypes.items()})
+        lo.update({f: min(lo[f], value) for f, value in chunk.min().items()})
+        hi.update({f: max(hi[f], value) for f, value in chunk.max().items()})
+    return pd.DataFrame({'varname': columns,
+                         'integer': [integer[f] for f in columns],
+                         'min': np.array([lo[f] for f in columns], dtype=np.float64),
+                         'max': np.array([hi[f] for f in columns], dtype=np.float64)})
+
+
+def read_meta(*paths, chunksize=1 << 17):
+    """
+    The meta table of `build_meta` over the complete files, e.g. train and test. Binary / nominal levels
+    come from the _bin / _cat name suffixes, the other columns are ordinal when every value of every file
+    is an integer and interval otherwise.
+    The extra min / max columns hold the value range over all files, so the dtypes of `compact_dtypes`
+    fit every row of them.
+    The per-file `column_stats` go through the data cache, so only the first run reads the csv files.
+    """
+    stats = pd.concat([cached(path, lambda p: column_stats(p, chunksize), tag="porto_data.column_stats")
+                       for path in paths])
+    stats = stats.groupby('varname', sort=False).agg({'integer': 'all', 'min': 'min', 'max': 'max'})
+
+    data = []
+    for f, row in stats.iterrows():
+        role = f if f in ('target', 'id') else 'input'
+        level = _level(f) or ('ordinal' if row.integer else 'interval')
+        data.append({'varname': f, 'role': role, 'level': level, 'keep': f != 'id',
+                     'dtype': np.dtype('int64' if row.integer else 'float64'), 'min': row['min'], 'max': row['max']})
+
+    meta = pd.DataFrame(data, columns=['varname', 'role', 'level', 'keep', 'dtype', 'min', 'max'])
+    meta.set_index('varname', inplace=True)
+    return meta
+
+
+def _int_dtype(lo, hi, smallest):
+    """The first of `smallest`, int16, int32, int64 holding [lo, hi]; `smallest` when the range is unknown."""
+    candidates = [smallest] + [d for d in ('int16', 'int32', 'int64') if np.iinfo(d).bits > np.iinfo(smallest).bits]
+    for dtype in candidates:
+        if np.isnan(lo) or (np.iinfo(dtype).min <= lo and hi <= np.iinfo(dtype).max):
+            return dtype
+    return 'int64'
+
+
+def compact_dtypes(meta, missing_as_na=True):
+    """
+    Smallest dtype for every column of `meta`.
+    With missing_as_na the integer columns that can hold -1 get nullable dtypes, otherwise signed ones
+    that keep -1 as a value. Binary columns have no missing values in this competition.
+    With the min / max columns of `read_meta` integer dtypes are widened to fit the range, and columns with
+    non-integer values are read as float32 whatever their level.
+    """
+    dtypes = {}
+    for f, row in meta.iterrows():
+        lo, hi = row.get('min', np.nan), row.get('max', np.nan)
+        if row.level == 'interval' or row['dtype'].kind == 'f':
+            dtypes[f] = 'float32'
+        elif row.role == 'id':
+            dtypes[f] = _int_dtype(lo, hi, 'int32')
+        elif row.level == 'binary' and not lo < 0:
+            dtypes[f] = _int_dtype(lo, hi, 'uint8')
+        else:
+            dtype = _int_dtype(lo, hi, 'int16')
+            dtypes[f] = dtype.capitalize() if missing_as_na else dtype
+    return dtypes
+
+
+def read_compact(path, meta, missing_as_na=True, categorical=False, verbose=True):
+    """
+    Reads a Porto csv with the dtypes given by `compact_dtypes`.
+    missing_as_na (bool) : read -1 as a missing value (nullable ints, NaN floats)
+    categorical (bool) : convert the nominal columns to pandas categoricals
+    verbose (bool) : print the memory saved against the default int64 / float64 read
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = compact_dtypes(meta, missing_as_na)
+    df = pd.read_csv(path, dtype={f: dtypes[f] for f in header if f in dtypes},
+                     na_values=['-1'] if missing_as_na else None)
+
+    if categorical:
+        cats = [f for f in df.columns if f in meta.index and meta.loc[f, 'level'] == 'nominal' and f != 'id']
+        df[cats] = df[cats].astype('category')
+
+    if verbose:
+        before = df.shape[0] * df.shape[1] * 8 + df.index.memory_usage()
+        after = df.memory_usage(deep=True).sum()
+        print(f"{path}: {before / 2 ** 20:.1f} MB -> {after / 2 ** 20:.1f} MB "
+              f"({1 - after / before:.0%} saved)")
+    return df
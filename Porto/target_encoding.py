@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+
+def add_noise(values, noise_level):
+    return values * (1 + noise_level * np.random.randn(*values.shape))
+
+
+class TargetEncoder:
+    """
+    Smoothed target encoding over integer category codes.
+    Smoothing is computed like in the following paper by Daniele Micci-Barreca
+    https://kaggle2.blob.core.windows.net/forum-message-attachments/225952/7441/high%20cardinality%20categoricals.pdf
+
+    Every categorical column is factorized once over train + test in `fit`. All columns share one flat code
+    space (each column owns a contiguous block of codes), so the per-category sums and counts of every column
+    come out of a single `np.bincount`, and encoding is a plain array lookup instead of a `pd.merge`.
+
+    min_samples_leaf (int) : minimum samples to take category average into account
+    smoothing (int) : smoothing effect to balance categorical average vs prior
+    noise_level (float) : multiplicative gaussian noise added to the encoded values
+    """
+
+    def __init__(self, min_samples_leaf=1, smoothing=1, noise_level=0):
+        self.min_samples_leaf = min_samples_leaf
+        self.smoothing = smoothing
+        self.noise_level = noise_level
+
+    def fit(self, train_df, test_df, columns):
+        """
+        Factorizes `columns` of train_df and test_df into one shared code space.
+        Slot 0 of every column block is reserved for missing values, which always encode to the prior.
+        """
+        self.columns = list(columns)
+        n_train = len(train_df)
+        train_codes = np.empty((n_train, len(self.columns)), dtype=np.int64)
+        test_codes = np.empty((len(test_df), len(self.columns)), dtype=np.int64)
+        self.missing_codes_ = np.empty(len(self.columns), dtype=np.int64)
+
+        offset = 0
+        for j, f in enumerate(self.columns):
+            codes, uniques = pd.factorize(np.concatenate([train_df[f].values, test_df[f].values]))
+            train_codes[:, j] = codes[:n_train] + 1 + offset
+            test_codes[:, j] = codes[n_train:] + 1 + offset
+            self.missing_codes_[j] = offset
+            offset += len(uniques) + 1
+
+        self.train_codes_ = train_codes
+        self.test_codes_ = test_codes
+        self.n_codes_ = offset
+        return self
+
+    def _averages(self, codes, target):
+        target = np.asarray(target, dtype=np.float64)
+        flat = codes.ravel()
+        sums = np.bincount(flat, weights=np.repeat(target, codes.shape[1]), minlength=self.n_codes_)
+        counts = np.bincount(flat, minlength=self.n_codes_)
+        return self._smooth(sums, counts, target.mean())
+
+    def _smooth(self, sums, counts, prior):
+        seen = counts > 0
+        mean = np.divide(sums, counts, out=np.zeros(len(sums)), where=seen)
+        weight = 1 / (1 + np.exp(-(counts - self.min_samples_leaf) / self.smoothing))
+        averages = prior * (1 - weight) + mean * weight
+        averages[~seen] = prior
+        averages[self.missing_codes_] = prior
+        return averages
+
+    def _encode(self, averages, codes):
+        values = averages[codes]
+        if self.noise_level:
+            values = add_noise(values, self.noise_level)
+        return values
+
+    def transform(self, target):
+        """
+        Encodes the full train and test sets with statistics of the whole training target.
+        Returns two arrays of shape (n_rows, n_columns) in `columns` order.
+        """
+        averages = self._averages(self.train_codes_, target)
+        return self._encode(averages, self.train_codes_), self._encode(averages, self.test_codes_)
+
+    def transform_fold(self, train_index, valid_index, target):
+        """
+        Encodes one fold: statistics come from the train_index rows only and are applied to
+        the train, validation and test rows. `target` is the full training target.
+        Returns three arrays of shape (n_rows, n_columns) in `columns` order.
+        """
+        target = np.asarray(target)
+        trn_codes = self.train_codes_[train_index]
+        averages = self._averages(trn_codes, target[train_index])
+        return (self._encode(averages, trn_codes),
+                self._encode(averages, self.train_codes_[valid_index]),
+                self._encode(averages, self.test_codes_))
+
+    def fit_folds(self, fold_ids, target):
+        """
+        Computes per-fold category sums and counts for the whole training set in one grouped reduction.
+        fold_ids : fold number of every training row, as returned by `fold_ids_from_splits`
+
+        The statistics of any union of folds are then derived by subtraction from the totals, so the
+        out-of-fold and nested modes never go back to the rows. The tables do not depend on
+        min_samples_leaf / smoothing, which can be changed between transforms.
+        """
+        fold_ids = np.asarray(fold_ids, dtype=np.int64)
+        target = np.asarray(target, dtype=np.float64)
+        n_folds = fold_ids.max() + 1
+        n_cols = self.train_codes_.shape[1]
+        keys = (fold_ids[:, None] * self.n_codes_ + self.train_codes_).ravel()
+        size = n_folds * self.n_codes_
+
+        self.fold_ids_ = fold_ids
+        self.fold_sums_ = np.bincount(keys, weights=np.repeat(target, n_cols), minlength=size)\
+            .reshape(n_folds, self.n_codes_)
+        self.fold_counts_ = np.bincount(keys, minlength=size).reshape(n_folds, self.n_codes_)
+        self.fold_target_sums_ = np.bincount(fold_ids, weights=target, minlength=n_folds)
+        self.fold_target_counts_ = np.bincount(fold_ids, minlength=n_folds)
+        self.total_sums_ = self.fold_sums_.sum(axis=0)
+        self.total_counts_ = self.fold_counts_.sum(axis=0)
+        return self
+
+    def _averages_without(self, excluded):
+        """Smoothed averages over all training rows except those in the `excluded` folds."""
+        excluded = list(excluded)
+        sums = self.total_sums_ - self.fold_sums_[excluded].sum(axis=0)
+        counts = self.total_counts_ - self.fold_counts_[excluded].sum(axis=0)
+        prior = (self.fold_target_sums_.sum() - self.fold_target_sums_[excluded].sum()) / \
+                (len(self.fold_ids_) - self.fold_target_counts_[excluded].sum())
+        return self._smooth(sums, counts, prior)
+
+    def _encode_oof(self, rows, excluded):
+        """Encodes the training `rows` with statistics that leave out each row's own fold and `excluded`."""
+        values = np.empty((len(rows), len(self.columns)))
+        row_folds = self.fold_ids_[rows]
+        for k in np.unique(row_folds):
+            mask = row_folds == k
+            averages = self._averages_without([k] + list(excluded))
+            values[mask] = averages[self.train_codes_[rows[mask]]]
+        if self.noise_level:
+            values = add_noise(values, self.noise_level)
+        return values
+
+    def transform_oof(self):
+        """
+        Out-of-fold encoding: every training row is encoded with the statistics of the other folds,
+        the test set with the statistics of the whole training set. Requires `fit_folds`.
+        """
+        rows = np.arange(len(self.fold_ids_))
+        return self._encode_oof(rows, []), self._encode(self._averages_without([]), self.test_codes_)
+
+    def transform_split(self, fold, nested=False):
+        """
+        Encodes outer fold `fold` from the fold tables: validation and test rows get the statistics of
+        all other folds. The training rows get the same statistics, or with nested=True are encoded
+        out-of-fold over the remaining folds. Returns the same (train, valid, test) triple as
+        `transform_fold`. Requires `fit_folds`.
+        """
+        train_rows = np.flatnonzero(self.fold_ids_ != fold)
+        valid_rows = np.flatnonzero(self.fold_ids_ == fold)
+        averages = self._averages_without([fold])
+        if nested:
+            train_values = self._encode_oof(train_rows, [fold])
+        else:
+            train_values = self._encode(averages, self.train_codes_[train_rows])
+        return (train_values,
+                self._encode(averages, self.train_codes_[valid_rows]),
+                self._encode(averages, self.test_codes_))
+
+    def feature_names(self, suffix="_avg"):
+        return [f + suffix for f in self.columns]
+
+
+def fold_ids_from_splits(splits, n_rows):
+    """Converts (train_index, valid_index) pairs of a K-fold splitter into one fold number per row."""
+    fold_ids = np.full(n_rows, -1, dtype=np.int64)
+    for k, (_, valid_index) in enumerate(splits):
+        fold_ids[valid_index] = k
+    assert (fold_ids >= 0).all(), "splits must cover every row exactly once"
+    return fold_ids
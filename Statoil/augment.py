@@ -0,0 +1,168 @@
+import numpy as np
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from scipy import ndimage
+
+
+def affine_matrices(theta, zx, zy):
+    """(B, 2, 2) matrices of rotation by theta (radians) after zoom (zx, zy), acting on (row, col) offsets."""
+    cos, sin = np.cos(theta), np.sin(theta)
+    return np.stack([np.stack([cos * zx, -sin * zy], axis=-1),
+                     np.stack([sin * zx, cos * zy], axis=-1)], axis=-2)
+
+
+def affine_per_image(images, matrices):
+    """Reference path: one scipy affine resample per image and channel, like keras' apply_affine_transform."""
+    center = (np.array(images.shape[1:3]) - 1) / 2
+    out = np.empty_like(images)
+    for i, matrix in enumerate(matrices):
+        offset = center - matrix @ center
+        for c in range(images.shape[-1]):
+            ndimage.affine_transform(images[i, ..., c], matrix, offset, output=out[i, ..., c], order=1,
+                                     mode="nearest")
+    return out
+
+
+def affine_batch(images, matrices):
+    """
+    Bilinear affine resample of a whole (B, H, W, C) batch at once, around the image center.
+    matrices : (B, 2, 2), output (row, col) offsets from the center are mapped to input offsets
+    Coordinates are clamped to the image, which matches scipy's mode="nearest" for order=1.
+    The bands share their coordinates, so every gather reads C contiguous floats; all work is float32 / int32
+    and done in place on the four corner gathers.
+    """
+    n, h, w, c = images.shape
+    center = np.array([(h - 1) / 2, (w - 1) / 2], dtype=np.float32)
+    rows, cols = np.meshgrid(np.arange(h, dtype=np.float32), np.arange(w, dtype=np.float32), indexing="ij")
+    grid = np.stack([rows.ravel(), cols.ravel()], axis=-1) - center
+    source = grid @ matrices.astype(np.float32).transpose(0, 2, 1) + center
+
+    r = np.clip(source[..., 0], 0, h - 1, out=source[..., 0])
+    q = np.clip(source[..., 1], 0, w - 1, out=source[..., 1])
+    r0 = r.astype(np.int32)
+    q0 = q.astype(np.int32)
+    fr = (r - r0)[..., None]
+    fq = (q - q0)[..., None]
+
+    corner = r0 * w
+    corner += q0
+    corner += (np.arange(n, dtype=np.int32) * (h * w))[:, None]
+    step_q = (q0 < w - 1).view(np.int8)
+    step_r = (r0 < h - 1).view(np.int8) * np.int32(w)
+
+    flat = np.ascontiguousarray(images, dtype=np.float32).reshape(n * h * w, c)
+    top = flat.take(corner, axis=0)
+    corner += step_q
+    top_right = flat.take(corner, axis=0)
+    corner += step_r
+    bottom_right = flat.take(corner, axis=0)
+    corner -= step_q
+    bottom = flat.take(corner, axis=0)
+
+    top_right -= top
+    top_right *= fq
+    top += top_right
+    bottom_right -= bottom
+    bottom_right *= fq
+    bottom += bottom_right
+    bottom -= top
+    bottom *= fr
+    top += bottom
+    return top.reshape(n, h, w, c)
+
+
+def draw_params(rng, n, horizontal_flip=False, vertical_flip=False, zoom_range=0., rotation_range=0.):
+    """Random flips, rotation (radians) and zoom of n images, in a fixed draw order."""
+    h_flip = rng.rand(n) < 0.5 if horizontal_flip else np.zeros(n, dtype=bool)
+    v_flip = rng.rand(n) < 0.5 if vertical_flip else np.zeros(n, dtype=bool)
+    theta = np.deg2rad(rng.uniform(-rotation_range, rotation_range, n)) if rotation_range else np.zeros(n)
+    zoom = rng.uniform(1 - zoom_range, 1 + zoom_range, (n, 2)) if zoom_range else np.ones((n, 2))
+    return h_flip, v_flip, theta, zoom
+
+
+def random_transform_batch(images, rng, per_image=False, **augmentation):
+    """
+    Randomly augments a (B, H, W, C) batch, one draw of every parameter per image.
+    Flips alone are served from reversed strided views. With rotation or zoom, the flips are folded into
+    the affine matrices and the batch goes through a single `affine_batch` resample
+    (per_image=True uses the scipy per-image path instead, for benchmarking).
+    """
+    images = np.asarray(images, dtype=np.float32)
+    h_flip, v_flip, theta, zoom = draw_params(rng, len(images), **augmentation)
+
+    if not augmentation.get("zoom_range") and not augmentation.get("rotation_range"):
+        out = images.copy()
+        out[h_flip] = images[:, :, ::-1][h_flip]
+        out[v_flip] = out[:, ::-1][v_flip]
+        return out
+
+    flips = np.stack([np.where(v_flip, -1., 1.), np.where(h_flip, -1., 1.)], axis=-1)
+    matrices = flips[:, :, None] * affine_matrices(theta, zoom[:, 0], zoom[:, 1])
+    if per_image:
+        return affine_per_image(images, matrices)
+    return affine_batch(images, matrices)
+
+
+class AugmentedFlow:
+    """
+    Endless ([images, *side_inputs], y) batches for fit_generator, replacing two ImageDataGenerator.flow
+    iterators driven in lockstep. Only the images are augmented, once per batch; side inputs (the angle)
+    and labels are gathered with the same indices.
+
+    Batches are built by n_workers background threads, up to `prefetch` batches ahead of the training loop.
+    Every batch draws from its own RandomState seeded with (seed, epoch, batch), so the stream is
+    reproducible per epoch and does not depend on the number of workers.
+    """
+
+    def __init__(self, images, side_inputs, y, batch_size=32, shuffle=True, seed=None, n_workers=2, prefetch=4,
+                 **augmentation):
+        self.images = images
+        self.side_inputs = [np.asarray(x) for x in side_inputs]
+        self.y = np.asarray(y)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed if seed is not None else np.random.randint(2 ** 31)
+        self.augmentation = augmentation
+        self.prefetch = prefetch
+
+        self.executor = ThreadPoolExecutor(max_workers=n_workers)
+        self.pending = deque()
+        self.n_batches = int(np.ceil(len(self.y) / batch_size))
+        self.batch_number = 0
+        self.order = None
+
+    def _next_indices(self):
+        position = self.batch_number % self.n_batches
+        if position == 0:
+            epoch = self.batch_number // self.n_batches
+            rng = np.random.RandomState([self.seed, epoch])
+            self.order = rng.permutation(len(self.y)) if self.shuffle else np.arange(len(self.y))
+        indices = self.order[position * self.batch_size:(position + 1) * self.batch_size]
+        return indices, [self.seed, self.batch_number // self.n_batches, position]
+
+    def _make_batch(self, indices, seed):
+        rng = np.random.RandomState(seed)
+        images = random_transform_batch(self.images[indices], rng, **self.augmentation)
+        return [images] + [x[indices] for x in self.side_inputs], self.y[indices]
+
+    def _submit(self):
+        indices, seed = self._next_indices()
+        self.pending.append(self.executor.submit(self._make_batch, indices, seed))
+        self.batch_number += 1
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while len(self.pending) < self.prefetch:
+            self._submit()
+        return self.pending.popleft().result()
+
+    def __len__(self):
+        return self.n_batches
+
+    def close(self):
+        for future in self.pending:
+            future.cancel()
+        self.executor.shutdown(wait=True)
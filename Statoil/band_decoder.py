@@ -0,0 +1,108 @@
+import json
+import numpy as np
+
+from common import cached, TensorStore
+
+IMAGE_SIZE = 75
+
+
+def count_records(path, chunk_size=1 << 24):
+    """Number of images in a Statoil json file, from a byte scan for the band_1 key."""
+    count = 0
+    tail = b""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            data = tail + chunk
+            count += data.count(b'"band_1"')
+            # a key split across two chunks is completed by the next one, a full key never fits in 7 bytes
+            tail = data[-7:]
+    return count
+
+
+def iter_records(path, chunk_size=1 << 22):
+    """
+    Yields the records of a json array one at a time, so that only one record is held as Python objects.
+    The file is read in chunks and every record is decoded with `JSONDecoder.raw_decode`.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            pos = 0
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if not started and pos < len(buffer) and buffer[pos] == "[":
+                    started = True
+                    pos += 1
+                    continue
+                if pos < len(buffer) and buffer[pos] == "]":
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except ValueError:
+                    break
+                yield record
+                pos = end
+            buffer = buffer[pos:]
+            if not chunk:
+                if buffer.strip():
+                    raise ValueError(f"{path}: truncated json array")
+                return
+
+
+SPECS = {"images": ((IMAGE_SIZE, IMAGE_SIZE, 3), np.float32),
+         "inc_angle": ((), np.float32),
+         "is_iceberg": ((), np.uint8),
+         "id": ((), "U16")}
+
+
+def allocate(n):
+    return {name: np.empty((n,) + shape, dtype=dtype) for name, (shape, dtype) in SPECS.items()}
+
+
+def fill(arrays, i, record):
+    """Writes one json record into row i of the preallocated arrays, the third channel is the band average."""
+    image = arrays["images"][i]
+    image[:, :, 0].flat = record["band_1"]
+    image[:, :, 1].flat = record["band_2"]
+    add_band_3(image)
+    angle = record["inc_angle"]
+    arrays["inc_angle"][i] = angle if isinstance(angle, (int, float)) else np.nan
+    arrays["is_iceberg"][i] = record.get("is_iceberg", 0)
+    arrays["id"][i] = record["id"]
+
+
+def add_band_3(images):
+    """Third channel, the average of the two bands, computed in place."""
+    np.add(images[..., 0], images[..., 1], out=images[..., 2])
+    images[..., 2] *= 0.5
+    return images
+
+
+def decode_bands(path):
+    """
+    Decodes a Statoil json file into a single preallocated (N, 75, 75, 3) float32 tensor, plus inc_angle
+    (float32, NaN where it is "na"), is_iceberg (uint8, 0 for the test set) and id.
+    """
+    arrays = allocate(count_records(path))
+    for i, record in enumerate(iter_records(path)):
+        fill(arrays, i, record)
+    return arrays
+
+
+def store_bands(path, directory):
+    """`decode_bands` into an on-disk TensorStore, so that decoding the large test set runs in bounded memory."""
+    store = TensorStore.create(directory, count_records(path), SPECS, meta={"source": path})
+    for i, record in enumerate(iter_records(path)):
+        fill(store.arrays, i, record)
+    return store.close()
+
+
+def load_bands(path):
+    """Decodes a Statoil json file once into a TensorStore in the data cache, then memory-maps it read-only."""
+    return cached(path, store_bands, kind="store", tag="store_bands")
+
@@ -0,0 +1,24 @@
+import time
+import numpy as np
+
+from augment import random_transform_batch
+
+augmentation = dict(horizontal_flip=True, vertical_flip=True, zoom_range=0.2, rotation_range=10)
+batch_size = 64
+repeats = 20
+
+images = np.random.RandomState(0).randn(batch_size, 75, 75, 3).astype(np.float32)
+
+for name, options in [("flips only", dict(horizontal_flip=True, vertical_flip=True)),
+                      ("per image", dict(augmentation, per_image=True)),
+                      ("batched", augmentation)]:
+    random_transform_batch(images, np.random.RandomState(0), **options)
+    start = time.perf_counter()
+    for i in range(repeats):
+        random_transform_batch(images, np.random.RandomState([0, i]), **options)
+    elapsed = (time.perf_counter() - start) / repeats
+    print(f"{name:>10} : {elapsed * 1000:7.2f} ms / batch of {batch_size}, {batch_size / elapsed:8.0f} images/s")
+
+batched = random_transform_batch(images, np.random.RandomState(1), **augmentation)
+per_image = random_transform_batch(images, np.random.RandomState(1), per_image=True, **augmentation)
+print("max abs difference, batched vs per image : %.2e" % np.abs(batched - per_image).max())
@@ -0,0 +1,44 @@
+import numpy as np
+
+from band_decoder import allocate, fill, iter_records
+
+
+def iter_chunks(path, chunk_size=1000):
+    """
+    Decodes a Statoil json file into chunks of at most chunk_size images.
+    One buffer of chunk_size rows is allocated and reused, so the yielded arrays are only valid until
+    the next chunk is requested.
+    """
+    buffer = allocate(chunk_size)
+    n = 0
+    for record in iter_records(path):
+        fill(buffer, n, record)
+        n += 1
+        if n == chunk_size:
+            yield buffer
+            n = 0
+    if n:
+        yield {name: values[:n] for name, values in buffer.items()}
+
+
+def predict_submission(path, predict_fns, out_path, chunk_size=1000, float_format="%.6f"):
+    """
+    Streams the test set through every fold model and writes the averaged is_iceberg to a submission csv.
+    predict_fns : one predict_fn(chunk) -> (n,) or (n, 1) probabilities per fold, where chunk holds the
+                  decoded arrays of `band_decoder.allocate` ("images", "inc_angle", "id")
+
+    The test json is decoded once whatever the number of folds, and memory is bounded by chunk_size.
+    Returns the number of rows written.
+    """
+    n_rows = 0
+    with open(out_path, "w") as f:
+        f.write("id,is_iceberg\n")
+        for chunk in iter_chunks(path, chunk_size):
+            pred = np.zeros(len(chunk["id"]))
+            for predict_fn in predict_fns:
+                pred += np.asarray(predict_fn(chunk)).reshape(-1)
+            pred /= len(predict_fns)
+
+            f.writelines(f"{i},{float_format % p}\n" for i, p in zip(chunk["id"], pred))
+            n_rows += len(pred)
+    return n_rows
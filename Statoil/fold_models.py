@@ -0,0 +1,61 @@
+import numpy as np
+
+from keras import backend as K
+from keras.callbacks import Callback
+
+
+class BestWeights(Callback):
+    """
+    Keeps the weights of the best epoch in memory (instead of ModelCheckpoint writing an HDF5 file on every
+    improvement) and restores them when training ends.
+    filepath (str) : optional, the best weights are also saved there once, at the end of training
+    """
+
+    def __init__(self, monitor="val_loss", mode="min", filepath=None):
+        super().__init__()
+        self.monitor = monitor
+        self.better = np.less if mode == "min" else np.greater
+        self.filepath = filepath
+
+    def on_train_begin(self, logs=None):
+        self.best = np.inf if self.better is np.less else -np.inf
+        self.best_weights = None
+
+    def on_epoch_end(self, epoch, logs=None):
+        current = (logs or {}).get(self.monitor)
+        if current is not None and self.better(current, self.best):
+            self.best = current
+            self.best_weights = self.model.get_weights()
+
+    def on_train_end(self, logs=None):
+        if self.best_weights is None:
+            self.best_weights = self.model.get_weights()
+        self.model.set_weights(self.best_weights)
+        if self.filepath is not None:
+            self.model.save_weights(self.filepath)
+
+
+class FoldModel:
+    """
+    One compiled model reused by every fold: build_fn (which may load pretrained weights from disk) runs once,
+    and `reset` restores the initial weights from an in-memory snapshot and clears the optimizer state.
+    Fold weights are kept as lists of arrays, and `predictor` swaps them in before predicting.
+    """
+
+    def __init__(self, build_fn):
+        self.model = build_fn()
+        self.initial_weights = self.model.get_weights()
+
+    def reset(self):
+        self.model.set_weights(self.initial_weights)
+        optimizer_weights = getattr(self.model.optimizer, "weights", [])
+        if optimizer_weights:
+            K.batch_set_value([(w, np.zeros(K.int_shape(w), dtype=K.dtype(w))) for w in optimizer_weights])
+        return self.model
+
+    def predictor(self, weights, inputs_fn):
+        """predict_fn(chunk) using the given fold weights, inputs_fn(chunk) builds the model inputs."""
+        def predict(chunk):
+            self.model.set_weights(weights)
+            return self.model.predict(inputs_fn(chunk))
+        return predict
@@ -1,9 +1,8 @@
 # https://www.kaggle.com/devm2024/keras-model-for-beginners-0-210-on-lb-eda-r-d
 
+import sys
 import os
 import pylab
-import numpy as np
-import pandas as pd
 import plotly.offline as py
 import plotly.graph_objs as go
 import matplotlib.pyplot as plt
@@ -22,16 +21,16 @@ from keras.layers.normalization import BatchNormalization
 from keras.optimizers import Adam
 from keras.callbacks import ModelCheckpoint, Callback, EarlyStopping
 
+sys.path.append("..")
+from band_decoder import load_bands
+from chunked_predict import predict_submission
+
 py.init_notebook_mode(connected=True)
 plt.rcParams["figure.figsize"] = 10, 10
 
-train = pd.read_json("data/train.json")
-test = pd.read_json("data/test.json")
+train = load_bands("data/train.json")
 
-X_band_1 = np.array([np.array(band).astype(np.float32).reshape(75, 75) for band in train["band_1"]])
-X_band_2 = np.array([np.array(band).astype(np.float32).reshape(75, 75) for band in train["band_2"]])
-X_train = np.concatenate([X_band_1[:, :, :, np.newaxis], X_band_2[:, :, :, np.newaxis],
-                          ((X_band_1+X_band_2) / 2)[:, :, :, np.newaxis]], axis=-1)
+X_train = train["images"]
 
 
 def plotmy3d(c, name):
@@ -45,8 +44,8 @@ def plotmy3d(c, name):
     py.plot(fig)
 
 
-plotmy3d(X_band_1[12, :, :], "iceberg")
-plotmy3d(X_band_1[14, :, :], "Ship")
+plotmy3d(X_train[12, :, :, 0], "iceberg")
+plotmy3d(X_train[14, :, :, 0], "Ship")
 
 
 def getModel():
@@ -108,14 +107,4 @@ score = gmodel.evaluate(X_valid, y_valid, verbose=1)
 print("Test loss: ", score[0])
 print("Test accuracy: ", score[1])
 
-X_band_test_1 = np.array([np.array(band).astype(np.float32).reshape(75, 75) for band in test["band_1"]])
-X_band_test_2 = np.array([np.array(band).astype(np.float32).reshape(75, 75) for band in test["band_2"]])
-X_test = np.concatenate([X_band_test_1[:, :, :, np.newaxis], X_band_test_2[:, :, :, np.newaxis],
-                         ((X_band_test_1 + X_band_test_2) / 2)[:, :, :, np.newaxis]], axis=-1)
-
-predicted_test = gmodel.predict_proba(X_test)
-
-submission = pd.DataFrame()
-submission["id"] = test["id"]
-submission["is_iceberg"] = predicted_test.reshape((predicted_test.shape[0]))
-submission.to_csv("data/sub.csv", index=False)
+predict_submission("data/test.json", [lambda chunk: gmodel.predict_proba(chunk["images"])], "data/sub.csv")
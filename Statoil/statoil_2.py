@@ -1,5 +1,6 @@
 # https://www.kaggle.com/devm2024/transfer-learning-with-vgg-16-cnn-aug-lb-0-1712
 
+import sys
 import pylab
 import numpy as np
 import pandas as pd
@@ -18,9 +19,8 @@ from keras.models import Model, Sequential
 from keras.layers import Conv2D, MaxPooling2D, Dense, Dropout, Input, Flatten, Activation, GlobalMaxPooling2D
 from keras.layers.merge import Concatenate
 from keras.layers.normalization import BatchNormalization
-from keras.callbacks import ModelCheckpoint, Callback, EarlyStopping
+from keras.callbacks import Callback, EarlyStopping
 from keras.optimizers import Adam, RMSprop, rmsprop, SGD
-from keras.preprocessing.image import ImageDataGenerator
 from keras.layers.advanced_activations import LeakyReLU, PReLU
 
 from keras.datasets import cifar10
@@ -31,57 +31,42 @@ from keras.applications.mobilenet import MobileNet
 from keras.applications.vgg19 import VGG19
 from keras.layers import Concatenate, LSTM, concatenate
 from keras.preprocessing import image
-from keras.preprocessing.image import ImageDataGenerator
 
-plt.rcParams["figure.figsize"] = 10, 10
-
-train = pd.read_json("data/train.json")
-test = pd.read_json("data/test.json")
-target_train = train["is_iceberg"]
+sys.path.append("..")
+from augment import AugmentedFlow
+from band_decoder import load_bands
+from chunked_predict import predict_submission
+from fold_models import BestWeights, FoldModel
+from vgg_features import vgg_backbone, cached_features, extract_features, dense_head, predict_tta
 
-train["inc_angle"] = pd.to_numeric(train["inc_angle"], errors="coerce")
-test["inc_angle"] = pd.to_numeric(test["inc_angle"], errors="coerce")
+plt.rcParams["figure.figsize"] = 10, 10
 
-train["inc_angle"] = train["inc_angle"].fillna(method="pad")
-X_angle = train["inc_angle"]
-test["inc_angle"] = pd.to_numeric(test["inc_angle"], errors="coerce")
-X_test_angle = test["inc_angle"]
+train = load_bands("data/train.json")
+target_train = pd.Series(train["is_iceberg"])
 
-X_band_1 = np.array([np.array(band).astype(np.float32).reshape(75, 75) for band in train["band_1"]])
-X_band_2 = np.array([np.array(band).astype(np.float32).reshape(75, 75) for band in train["band_2"]])
-X_band_3 = (X_band_1 + X_band_2) / 2
-X_train = np.concatenate([X_band_1[:, :, :, np.newaxis], X_band_2[:, :, :, np.newaxis], X_band_3[:, :, :, np.newaxis]], axis=-1)
+X_angle = pd.Series(train["inc_angle"]).fillna(method="pad")
 
-X_band_test_1 = np.array([np.array(band).astype(np.float32).reshape(75, 75) for band in test["band_1"]])
-X_band_test_2 = np.array([np.array(band).astype(np.float32).reshape(75, 75) for band in test["band_2"]])
-X_band_test_3 = (X_band_test_1 + X_band_test_2) / 2
-X_test = np.concatenate([X_band_test_1[:, :, :, np.newaxis], X_band_test_2[:, :, :, np.newaxis], X_band_test_3[:, :, :, np.newaxis]], axis=-1)
+X_train = train["images"]
 
 batch_size = 64
-gen = ImageDataGenerator(horizontal_flip=True,
-                         vertical_flip=True,
-                         width_shift_range=0.,
-                         height_shift_range=0.,
-                         channel_shift_range=0,
-                         zoom_range=0.2,
-                         rotation_range=10)
-
+augmentation = dict(horizontal_flip=True,
+                    vertical_flip=True,
+                    zoom_range=0.2,
+                    rotation_range=10)
 
-def gen_flow_for_two_inputs(X1, X2, y):
-    genX1 = gen.flow(X1, y, batch_size=batch_size, seed=55)
-    genX2 = gen.flow(X1, X2, batch_size=batch_size, seed=55)
+# set to train only the dense head on cached block5_pool features of the frozen backbone, with flips as
+# precomputed test-time augmentations instead of on-line augmentation (faster, but not the fine-tuned VGG16)
+USE_FEATURE_CACHE = False
+TTA_MODES = ("identity", "hflip", "vflip", "hvflip")
+# best-epoch weights stay in memory; set to also write each fold's best weights to data/ once
+PERSIST_WEIGHTS = False
 
-    while True:
-        X1i = genX1.next()
-        X2i = genX2.next()
-        yield [X1i[0], X2i[1]], X1i[1]
 
-
-def get_callbacks(filepath, patience=2):
+def get_callbacks(filepath=None, patience=2):
     es = EarlyStopping("val_loss", patience=10, mode="min")
-    msave = ModelCheckpoint(filepath, save_best_only=True)
+    best = BestWeights("val_loss", mode="min", filepath=filepath if PERSIST_WEIGHTS else None)
 
-    return [es, msave]
+    return [es, best]
 
 
 def getVggAngleModel():
@@ -107,12 +92,13 @@ def getVggAngleModel():
     return model
 
 
-def myAngleCV(X_train, X_angle, X_test):
+def myAngleCV(X_train, X_angle):
     K=3
     folds = list(StratifiedKFold(n_splits=K, shuffle=True, random_state=16).split(X_train, target_train))
 
+    fold_model = FoldModel(getVggAngleModel)
+    fold_weights = []
     y_train_pred_log = 0
-    y_test_pred_log = 0
     y_valid_pred_log = 0.0 * target_train
     for j, (train_idx, test_idx) in enumerate(folds):
         print("\n==================FOLD=", j)
@@ -126,8 +112,9 @@ def myAngleCV(X_train, X_angle, X_test):
 
         file_path = "data/%s_aug_model_weights.hdf5"%j
         callbacks = get_callbacks(filepath=file_path, patience=5)
-        gen_flow = gen_flow_for_two_inputs(X_train_cv, X_angle_cv, y_train_cv)
-        galaxyModel = getVggAngleModel()
+        gen_flow = AugmentedFlow(X_train_cv, [X_angle_cv], y_train_cv, batch_size=batch_size, seed=55,
+                                 **augmentation)
+        galaxyModel = fold_model.reset()
         galaxyModel.fit_generator(gen_flow,
                                   steps_per_epoch=24,
                                   epochs=100,
@@ -135,7 +122,7 @@ def myAngleCV(X_train, X_angle, X_test):
                                   verbose=1,
                                   validation_data=([X_holdout, X_angle_hold], Y_holdout),
                                   callbacks=callbacks)
-        galaxyModel.load_weights(filepath=file_path)
+        gen_flow.close()
         score = galaxyModel.evaluate([X_train_cv, X_angle_cv], y_train_cv, verbose=0)
         print("Train loss: ", score[0])
         print("Train accuracy: ", score[1])
@@ -146,21 +133,86 @@ def myAngleCV(X_train, X_angle, X_test):
         pred_valid = galaxyModel.predict([X_holdout, X_angle_hold])
         y_valid_pred_log[test_idx] = pred_valid.reshape(pred_valid.shape[0])
 
-        temp_train= galaxyModel.predict([X_test, X_test_angle])
+        temp_train = galaxyModel.predict([X_train, X_angle])
         y_train_pred_log += temp_train.reshape(temp_train.shape[0])
 
-    y_test_pred_log = y_test_pred_log / K
+        fold_weights.append(galaxyModel.get_weights())
+
+    y_train_pred_log = y_train_pred_log / K
+
+    print("\n Train Log Loss Validation= ", log_loss(target_train, y_train_pred_log))
+    print("Test Log Loss Validation= ", log_loss(target_train, y_valid_pred_log))
+
+    return fold_model, fold_weights
+
+
+def myFeatureCV(X_train, X_angle):
+    K=3
+    folds = list(StratifiedKFold(n_splits=K, shuffle=True, random_state=16).split(X_train, target_train))
+
+    backbone = vgg_backbone(X_train.shape[1:])
+    features = cached_features(backbone, X_train, TTA_MODES)
+    n_tta = len(TTA_MODES)
+    angles = X_angle.values
+    targets = target_train.values
+
+    head_model = FoldModel(lambda: dense_head(features.shape[2:]))
+    heads = []
+    y_train_pred_log = 0
+    y_valid_pred_log = 0.0 * target_train
+    for j, (train_idx, test_idx) in enumerate(folds):
+        print("\n==================FOLD=", j)
+        X_train_cv = features[:, train_idx].reshape((-1,) + features.shape[2:])
+        X_angle_cv = np.tile(angles[train_idx], n_tta)
+        y_train_cv = np.tile(targets[train_idx], n_tta)
+
+        file_path = "data/%s_head_weights.hdf5"%j
+        callbacks = get_callbacks(filepath=file_path, patience=5)
+        head = head_model.reset()
+        head.fit([X_train_cv, X_angle_cv], y_train_cv,
+                 batch_size=batch_size,
+                 epochs=100,
+                 shuffle=True,
+                 verbose=1,
+                 validation_data=([features[0, test_idx], angles[test_idx]], targets[test_idx]),
+                 callbacks=callbacks)
+
+        pred_valid = predict_tta(head, features[:, test_idx], angles[test_idx])
+        print("Test loss: ", log_loss(targets[test_idx], pred_valid))
+        y_valid_pred_log[test_idx] = pred_valid
+
+        y_train_pred_log += predict_tta(head, features, angles)
+
+        heads.append(head.get_weights())
+
     y_train_pred_log = y_train_pred_log / K
 
     print("\n Train Log Loss Validation= ", log_loss(target_train, y_train_pred_log))
     print("Test Log Loss Validation= ", log_loss(target_train, y_valid_pred_log))
 
-    return y_test_pred_log
+    return backbone, head_model, heads
+
+
+def model_inputs(chunk):
+    return [chunk["images"], chunk["inc_angle"]]
+
 
+def feature_predictor(backbone, head_model, heads):
+    """Backbone features are computed once per test chunk and shared by all fold heads."""
+    def predict(chunk):
+        features = extract_features(backbone, chunk["images"], TTA_MODES)
+        preds = []
+        for weights in heads:
+            head_model.model.set_weights(weights)
+            preds.append(predict_tta(head_model.model, features, chunk["inc_angle"]))
+        return np.mean(preds, axis=0)
+    return predict
 
-preds = myAngleCV(X_train, X_angle, X_test)
 
-submission = pd.DataFrame()
-submission["id"] = test["id"]
-submission["is_iceberg"] = preds
-submission.to_csv("data/sub2.csv", index=False)
+if USE_FEATURE_CACHE:
+    backbone, head_model, heads = myFeatureCV(X_train, X_angle)
+    predict_submission("data/test.json", [feature_predictor(backbone, head_model, heads)], "data/sub2.csv")
+else:
+    fold_model, fold_weights = myAngleCV(X_train, X_angle)
+    predict_submission("data/test.json", [fold_model.predictor(weights, model_inputs) for weights in fold_weights],
+                       "data/sub2.csv")
@@ -0,0 +1,89 @@
+import os
+import hashlib
+import numpy as np
+
+from keras.models import Model
+from keras.layers import Dense, Dropout, Input, GlobalMaxPooling2D, concatenate
+from keras.applications.vgg16 import VGG16
+from keras.optimizers import SGD
+
+FEATURE_LAYER = "block5_pool"
+CACHE_DIR = "data/.cache"
+
+# test-time augmentations, as views of a (N, H, W, C) batch
+TTA = {"identity": lambda x: x,
+       "hflip": lambda x: x[:, :, ::-1],
+       "vflip": lambda x: x[:, ::-1],
+       "hvflip": lambda x: x[:, ::-1, ::-1]}
+
+
+def vgg_backbone(input_shape):
+    """Frozen VGG16 (ImageNet weights) cut at block5_pool."""
+    base_model = VGG16(weights="imagenet", include_top=False, input_shape=input_shape)
+    backbone = Model(inputs=base_model.input, outputs=base_model.get_layer(FEATURE_LAYER).output)
+    backbone.trainable = False
+    return backbone
+
+
+def feature_key(backbone, images, tta):
+    """Hash of the backbone weights, the input images and the list of augmentations."""
+    sha = hashlib.sha1()
+    for weights in backbone.get_weights():
+        sha.update(np.ascontiguousarray(weights).data)
+    sha.update(np.ascontiguousarray(images).data)
+    sha.update(repr((images.shape, str(images.dtype), list(tta))).encode())
+    return sha.hexdigest()[:16]
+
+
+def extract_features(backbone, images, tta=("identity",), batch_size=64):
+    """(len(tta), N, *feature_shape) float32 features of every augmentation of the images."""
+    features = np.empty((len(tta), len(images)) + backbone.output_shape[1:], dtype=np.float32)
+    for t, name in enumerate(tta):
+        for start in range(0, len(images), batch_size):
+            batch = TTA[name](np.asarray(images[start:start + batch_size], dtype=np.float32))
+            features[t, start:start + len(batch)] = backbone.predict_on_batch(batch)
+    return features
+
+
+def cached_features(backbone, images, tta=("identity",), batch_size=64, cache_dir=CACHE_DIR):
+    """
+    `extract_features` computed once and stored as .npy in cache_dir, keyed by `feature_key`;
+    later calls with the same weights, images and augmentations read a memory map.
+    """
+    path = os.path.join(cache_dir, f"vgg16_{FEATURE_LAYER}.{feature_key(backbone, images, tta)}.npy")
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+
+    features = extract_features(backbone, images, tta, batch_size)
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(path + ".tmp.npy", features)
+    os.replace(path + ".tmp.npy", path)
+    return features
+
+
+def dense_head(feature_shape):
+    """The angle-merged classifier of getVggAngleModel, on top of cached block5_pool features."""
+    input_1 = Input(shape=feature_shape, name="features")
+    input_2 = Input(shape=[1], name="angle")
+    angle_layer = Dense(1, )(input_2)
+
+    x = GlobalMaxPooling2D()(input_1)
+    merge_one = concatenate([x, angle_layer])
+    merge_one = Dense(512, activation="relu", name="fc2")(merge_one)
+    merge_one = Dropout(0.3)(merge_one)
+    merge_one = Dense(512, activation="relu", name="fc3")(merge_one)
+    merge_one = Dropout(0.3)(merge_one)
+
+    predictions = Dense(1, activation="sigmoid")(merge_one)
+
+    model = Model(inputs=[input_1, input_2], outputs=predictions)
+
+    sgd = SGD(lr=1e-3, decay=1e-5, momentum=0.9, nesterov=True)
+    model.compile(loss="binary_crossentropy", optimizer=sgd, metrics=["accuracy"])
+
+    return model
+
+
+def predict_tta(head, features, angles, batch_size=256):
+    """Head predictions averaged over the augmentations of (T, N, ...) features."""
+    return np.mean([head.predict([f, angles], batch_size=batch_size).reshape(-1) for f in features], axis=0)
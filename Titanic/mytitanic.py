@@ -1,3 +1,4 @@
+import sys
 import time
 import warnings
 import numpy as np
@@ -34,10 +35,13 @@ from sklearn.ensemble import BaggingClassifier  # bagging
 from sklearn.ensemble import AdaBoostClassifier  # AdaBoosting
 from sklearn.ensemble import GradientBoostingClassifier  # Stochastic Gradient Boosting
 
+sys.path.append("..")
+from common import read_csv
+
 warnings.filterwarnings('ignore')
 
-train = pd.read_csv('./data/train.csv')
-test = pd.read_csv('./data/test.csv')
+train = read_csv('./data/train.csv')
+test = read_csv('./data/test.csv')
 PassengerId = test['PassengerId']
 
 # print(train.shape[0])
@@ -1,3 +1,4 @@
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -16,11 +17,14 @@ from sklearn.neural_network import MLPClassifier
 from sklearn.svm import SVC
 from sklearn.model_selection import GridSearchCV, cross_val_score, StratifiedKFold, learning_curve
 
+sys.path.append("..")
+from common import read_csv
+
 warnings.filterwarnings('ignore')
 sns.set(style='white', context='notebook', palette='deep')
 
-train = pd.read_csv('./data/train.csv')
-test = pd.read_csv('./data/test.csv')
+train = read_csv('./data/train.csv')
+test = read_csv('./data/test.csv')
 IDtest = test['PassengerId']
 
 
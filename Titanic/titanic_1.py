@@ -1,3 +1,4 @@
+import sys
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -9,13 +10,16 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn import metrics
 from sklearn.model_selection import train_test_split
 
+sys.path.append("..")
+from common import read_csv
+
 plt.style.use('seaborn')
 sns.set(font_scale=2.5)
 
 warnings.filterwarnings('ignore')
 
-df_train = pd.read_csv('data/train.csv')
-df_test = pd.read_csv('data/test.csv')
+df_train = read_csv('data/train.csv')
+df_test = read_csv('data/test.csv')
 
 print(df_train.head())
 
@@ -320,7 +324,7 @@ plt.xlabel('Feature importance')
 plt.ylabel('Feature')
 # plt.show()
 
-submission = pd.read_csv('./data/gender_submission.csv')
+submission = read_csv('./data/gender_submission.csv')
 print(submission.head())
 
 prediction = model.predict(X_test)
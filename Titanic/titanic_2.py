@@ -1,3 +1,4 @@
+import sys
 import time
 import warnings
 import numpy as np
@@ -29,10 +30,13 @@ from sklearn.ensemble import BaggingClassifier  # bagging
 from sklearn.ensemble import AdaBoostClassifier  # AdaBoosting
 from sklearn.ensemble import GradientBoostingClassifier  # Stochastic Gradient Boosting
 
+sys.path.append("..")
+from common import read_csv
+
 warnings.filterwarnings('ignore')
 plt.style.use('fivethirtyeight')
 
-data = pd.read_csv('./data/train.csv')
+data = read_csv('./data/train.csv')
 print(data.head())
 print(data.isnull().sum()) # checking for total null values
 
@@ -1,3 +1,4 @@
+import sys
 import pandas as pd
 import numpy as np
 import re
@@ -15,6 +16,9 @@ from sklearn.ensemble import (RandomForestClassifier, AdaBoostClassifier,
 from sklearn.svm import SVC
 from sklearn.cross_validation import KFold
 
+sys.path.append("..")
+from common import read_csv
+
 py.init_notebook_mode(connected=True)
 warnings.filterwarnings('ignore')
 
@@ -22,8 +26,8 @@ warnings.filterwarnings('ignore')
 
 # Feature Exploration, Engineering and Cleaning
 # Load in the train and test datasets
-train = pd.read_csv('./data/train.csv')
-test = pd.read_csv('./data/test.csv')
+train = read_csv('./data/train.csv')
+test = read_csv('./data/test.csv')
 
 # Store our passenger ID for easy access
 PassengerId = test['PassengerId']
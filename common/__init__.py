@@ -0,0 +1,5 @@
+from .data_cache import cached, cached_frame, read_csv, read_json
+from .tensor_store import TensorStore
+from .pixel_csv import load_pixel_csv
+from .collinearity import correlated_columns
+from .process_pool import InlineExecutor, can_fork, fork_pool
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+def _standardize(values):
+    """Columns scaled to zero mean and unit variance over their non-missing rows, missing rows set to 0."""
+    present = ~np.isnan(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+        scaled = (values - mean) / std
+    # constant columns have no defined correlation
+    scaled[:, ~(std > 0)] = np.nan
+    scaled[~present] = 0
+    return scaled, present
+
+
+def _block_corr(z, present, rows, cols):
+    """
+    Pearson correlations between the columns `rows` and `cols` of standardized data, with BLAS products.
+    With missing values every pair only uses the rows where both columns are present, as DataFrame.corr does.
+    """
+    zr, zc = z[:, rows], z[:, cols]
+    if present is None:
+        return zr.T @ zc / len(z)
+
+    mr = present[:, rows].astype(np.float64)
+    mc = present[:, cols].astype(np.float64)
+    n = mr.T @ mc
+    sx = zr.T @ mc
+    sy = mr.T @ zc
+    sxx = (zr * zr).T @ mc
+    syy = mr.T @ (zc * zc)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = zr.T @ zc - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        corr = cov / np.sqrt(var_x * var_y)
+    # a column constant over the rows shared with its pair cancels to a rounding residue instead of 0,
+    # pandas gives NaN there
+    tol = np.finfo(np.float64).eps * np.maximum(n, 1)
+    corr[(var_x <= tol * sxx) | (var_y <= tol * syy)] = np.nan
+    return corr
+
+
+def correlated_columns(df, threshold=0.95, block_size=256):
+    """
+    Columns to drop because their absolute correlation with an earlier column is above threshold, the same list
+    as scanning the upper triangle of df.corr() column by column, without building the p x p matrix.
+    df (DataFrame) : only numeric / bool columns are considered
+    threshold (float) : absolute Pearson correlation above which the later column of a pair is dropped
+    block_size (int) : columns per block; correlations are computed block against block with matrix products
+
+    Columns are standardized once. A column stops being compared as soon as one earlier column correlates
+    with it, so later blocks only score the columns that are still kept.
+    """
+    columns = list(df.select_dtypes(include=["number", "bool"]).columns)
+    z, present = _standardize(df[columns].to_numpy(dtype=np.float64, na_value=np.nan))
+    if present.all():
+        present = None
+
+    drop = np.zeros(len(columns), dtype=bool)
+    for start in range(0, len(columns), block_size):
+        block = np.arange(start, min(start + block_size, len(columns)))
+        for earlier in range(0, start + 1, block_size):
+            candidates = block[~drop[block]]
+            if not len(candidates):
+                break
+            rows = np.arange(earlier, min(earlier + block_size, len(columns)))
+            with np.errstate(invalid="ignore"):
+                hits = np.abs(_block_corr(z, present, rows, candidates)) > threshold
+            # only pairs (i, j) with i < j count, which matters on the diagonal block
+            hits &= rows[:, None] < candidates[None, :]
+            drop[candidates[hits.any(axis=0)]] = True
+
+    return [column for column, dropped in zip(columns, drop) if dropped]
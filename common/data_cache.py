@@ -0,0 +1,183 @@
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+
+from .tensor_store import TensorStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = feather = None
+
+CACHE_DIR = ".cache"
+CACHE_VERSION = 1
+
+
+def file_hash(path, chunk_size=1 << 20):
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _entry(path, tag):
+    """Cache entry prefix for `path` parsed as `tag`, stored in a .cache directory next to the raw file."""
+    directory = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    key = hashlib.sha1(f"{CACHE_VERSION}|{os.path.basename(path)}|{tag}".encode()).hexdigest()[:16]
+    return os.path.join(directory, f"{os.path.basename(path)}.{key}")
+
+
+def _is_fresh(manifest_path, path):
+    """
+    The size and mtime of the raw file are checked first; only when they changed is the file hashed,
+    so touching or copying a file does not trigger a re-parse.
+    """
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    stat = os.stat(path)
+    if manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if manifest["size"] != stat.st_size or manifest["sha1"] != file_hash(path):
+        return False
+
+    _write_manifest(manifest_path, path, manifest["kind"], manifest["sha1"])
+    return True
+
+
+def _write_manifest(manifest_path, path, kind, sha1=None):
+    stat = os.stat(path)
+    manifest = {"source": os.path.basename(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha1": sha1 or file_hash(path),
+                "kind": kind}
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def _save_frame(prefix, df):
+    """
+    Feather for frames with a default index, pickle otherwise or when arrow cannot type a column
+    (e.g. an object column mixing floats and strings such as "na").
+    """
+    if feather is not None and isinstance(df.index, pd.RangeIndex) and df.index.start == 0 \
+            and df.index.step == 1:
+        try:
+            feather.write_feather(df, prefix + ".feather", compression="uncompressed")
+            return
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    # a partial or stale feather file would be preferred by _load_frame
+    if os.path.exists(prefix + ".feather"):
+        os.remove(prefix + ".feather")
+    with open(prefix + ".pkl", "wb") as f:
+        pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_frame(prefix):
+    if os.path.exists(prefix + ".feather"):
+        return feather.read_table(prefix + ".feather", memory_map=True).to_pandas()
+    with open(prefix + ".pkl", "rb") as f:
+        return pickle.load(f)
+
+
+def _save_arrays(prefix, arrays):
+    shutil.rmtree(prefix, ignore_errors=True)
+    os.makedirs(prefix)
+    for name, values in arrays.items():
+        np.save(os.path.join(prefix, name + ".npy"), np.asarray(values))
+
+
+def _load_arrays(prefix):
+    return {name[:-len(".npy")]: np.load(os.path.join(prefix, name), mmap_mode="r")
+            for name in sorted(os.listdir(prefix)) if name.endswith(".npy")}
+
+
+def cached(path, parse, kind="frame", tag=None):
+    """
+    Parses a raw data file once and serves later calls from a binary cache.
+    path : raw csv / json file
+    parse : parse(path) -> DataFrame (kind="frame") or dict of arrays (kind="arrays"),
+            parse(path, directory) writing a TensorStore into directory (kind="store")
+    kind (str) : "frame" is stored as uncompressed Feather (pickle without pyarrow) and read back through a
+                 memory map, "arrays" as one .npy per array, returned as read-only memmaps,
+                 "store" is returned as a read-only TensorStore
+    tag (str) : identifies the parser and its options, different tags of one file are cached separately
+
+    Entries are keyed by the file name and tag, and invalidated when the file's content hash changes.
+    """
+    prefix = _entry(path, tag or getattr(parse, "__qualname__", repr(parse)))
+    manifest_path = prefix + ".json"
+    load = {"frame": _load_frame, "arrays": _load_arrays, "store": TensorStore.open}[kind]
+
+    if _is_fresh(manifest_path, path):
+        return load(prefix)
+
+    os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    if kind == "store":
+        parse(path, prefix)
+        _write_manifest(manifest_path, path, kind)
+        return load(prefix)
+
+    data = parse(path)
+    if kind == "frame":
+        _save_frame(prefix, data)
+    else:
+        _save_arrays(prefix, data)
+    _write_manifest(manifest_path, path, kind)
+    return load(prefix) if kind == "arrays" else data
+
+
+def _fingerprint(value):
+    """
+    Content key of a parser argument. Frames and arrays are hashed rather than printed: their repr depends
+    on the display options, elides rows and rounds floats, so different arguments could share a key.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        dtypes = value.dtypes.astype(str).tolist() if isinstance(value, pd.DataFrame) else str(value.dtype)
+        names = value.columns.tolist() if isinstance(value, pd.DataFrame) else value.name
+        sha = hashlib.sha1(repr((type(value).__name__, value.shape, names, dtypes)).encode())
+        sha.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+        return sha.hexdigest()
+    if isinstance(value, np.ndarray):
+        sha = hashlib.sha1(repr((value.shape, value.dtype.str)).encode())
+        if value.dtype.hasobject:
+            sha.update(repr(value.tolist()).encode())
+        else:
+            sha.update(np.ascontiguousarray(value).tobytes())
+        return sha.hexdigest()
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{key!r}:{_fingerprint(item)}" for key, item in sorted(value.items())) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_fingerprint(item) for item in value) + "]"
+    return repr(value)
+
+
+def _tag(name, args, kwargs):
+    return f"{name}{_fingerprint(args)}{_fingerprint(dict(kwargs))}"
+
+
+def cached_frame(path, parse, *args, **kwargs):
+    """`cached` for parse(path, *args, **kwargs) returning a DataFrame, tagged by the parser and its arguments."""
+    name = f"{parse.__module__}.{parse.__qualname__}"
+    return cached(path, lambda p: parse(p, *args, **kwargs), tag=_tag(name, args, kwargs))
+
+
+def read_csv(path, **kwargs):
+    return cached_frame(path, pd.read_csv, **kwargs)
+
+
+def read_json(path, **kwargs):
+    return cached_frame(path, pd.read_json, **kwargs)
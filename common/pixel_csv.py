@@ -0,0 +1,108 @@
+import numpy as np
+
+from .data_cache import cached
+from .tensor_store import TensorStore
+
+
+def count_rows(path, chunk_size=1 << 24):
+    """Number of data rows of a csv file with a header line; blank lines are skipped, as pd.read_csv does."""
+    starts, after_newline = 0, True
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            newline = np.frombuffer(chunk.replace(b"\r", b""), dtype=np.uint8) == ord("\n")
+            if not len(newline):
+                continue
+            # a row starts at every non-newline byte that follows a newline (or the start of the file)
+            starts += int(after_newline and not newline[0]) + np.count_nonzero(newline[:-1] & ~newline[1:])
+            after_newline = newline[-1]
+    return starts - 1
+
+
+def _skip_blank_lines(lines):
+    lines = lines.lstrip(b"\n")
+    while b"\n\n" in lines:
+        lines = lines.replace(b"\n\n", b"\n")
+    return lines
+
+
+def parse_uint8_lines(block, n_fields):
+    """
+    Parses complete csv lines of integers in [0, 255] straight into a uint8 (rows, n_fields) array.
+    Field boundaries come from one scan for separators and every value is assembled from at most its
+    three last digits in uint8 arithmetic, without going through Python objects or wider dtypes.
+    Raises ValueError on a wrong field count, an empty or non-digit field (signs, spaces, decimals) or a value
+    above 255.
+    """
+    buf = np.frombuffer(block, dtype=np.uint8)
+    separators = (buf == ord(",")) | (buf == ord("\n"))
+    ends = np.flatnonzero(separators)
+    length = np.diff(ends, prepend=-1) - 1
+    if len(ends) % n_fields or length.min() < 1 or length.max() > 3:
+        raise ValueError("not a csv of integers in [0, 255] with %d fields per line" % n_fields)
+
+    digits = np.zeros(len(buf) + 2, dtype=np.uint8)
+    np.subtract(buf, ord("0"), out=digits[2:])
+    if np.any((digits[2:] > 9) & ~separators):
+        raise ValueError("not a csv of integers in [0, 255]: non-digit character in a field")
+
+    ends += 2
+    hundreds = ends[length == 3]
+    if len(hundreds) and np.any(digits[hundreds - 3].astype(np.int16) * 100 + digits[hundreds - 2] * 10
+                                + digits[hundreds - 1] > 255):
+        raise ValueError("not a csv of integers in [0, 255]: value above 255")
+
+    values = digits[ends - 1]
+    values += digits[ends - 2] * np.uint8(10) * (length >= 2)
+    values += digits[ends - 3] * np.uint8(100) * (length >= 3)
+    return values.reshape(-1, n_fields)
+
+
+def iter_uint8_blocks(path, block_size=1 << 24):
+    """
+    Yields uint8 rows for blocks of about block_size bytes of a csv file with a header line, skipping blank
+    lines.
+    """
+    with open(path, "rb") as f:
+        n_fields = f.readline().count(b",") + 1
+        rest = b""
+        for chunk in iter(lambda: f.read(block_size), b""):
+            chunk = (rest + chunk).replace(b"\r", b"")
+            cut = chunk.rfind(b"\n") + 1
+            rest = chunk[cut:]
+            lines = _skip_blank_lines(chunk[:cut])
+            if lines:
+                yield parse_uint8_lines(lines, n_fields)
+        if rest.strip():
+            yield parse_uint8_lines(rest.rstrip(b"\n") + b"\n", n_fields)
+
+
+def store_pixel_csv(path, directory, label="label", side=28, block_size=1 << 24):
+    """
+    Writes a MNIST-style csv (optional label column, then side * side pixel columns) into a TensorStore
+    with uint8 images of shape (N, side, side, 1) and int64 labels.
+    The file is parsed block by block straight into the memory-mapped tensors (`parse_uint8_lines`);
+    scaling to float happens later, per batch.
+    """
+    with open(path) as f:
+        header = f.readline().strip().split(",")
+    has_label = label in header
+    specs = {"images": ((side, side, 1), np.uint8)}
+    if has_label:
+        specs["labels"] = ((), np.int64)
+    store = TensorStore.create(directory, count_rows(path), specs, meta={"source": path})
+
+    pixels = [i for i, name in enumerate(header) if name != label]
+    start = 0
+    for rows in iter_uint8_blocks(path, block_size):
+        values = {"images": rows[:, pixels].reshape(-1, side, side, 1)}
+        if has_label:
+            values["labels"] = rows[:, header.index(label)]
+        store.write(start, **values)
+        start += len(rows)
+    return store.close()
+
+
+def load_pixel_csv(path, label="label", side=28):
+    """`store_pixel_csv` through the data cache, memory-mapped read-only on later runs."""
+    return cached(path, lambda p, directory: store_pixel_csv(p, directory, label, side), kind="store",
+                  tag=f"store_pixel_csv({label!r}, {side})")
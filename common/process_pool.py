@@ -0,0 +1,35 @@
+import warnings
+import multiprocessing
+
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+
+
+class InlineExecutor(Executor):
+    """Runs every submitted call at once in this process; the returned futures are already done."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def can_fork():
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def fork_pool(max_workers, initializer=None, initargs=(), name="work"):
+    """
+    A process pool started with fork, so workers inherit the functions and data of the calling script.
+    The scripts using it have no `if __name__ == "__main__":` guard, and spawned workers would re-run them,
+    so without fork an InlineExecutor is returned instead, with a warning.
+    The initializer only runs in pool workers; callers set up the in-process state themselves when
+    `can_fork()` is False.
+    """
+    if can_fork():
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("fork"),
+                                   initializer=initializer, initargs=initargs)
+    warnings.warn(f"fork is not available, the {name} runs in this process, one task after another")
+    return InlineExecutor()
@@ -0,0 +1,101 @@
+import os
+import json
+import numpy as np
+
+INDEX = "index.json"
+
+
+class TensorStore:
+    """
+    A directory of row-aligned tensors (images, labels, angles ...), one .npy file per tensor plus a small
+    index.json with the row count, shapes, dtypes and free-form metadata.
+
+    Tensors are written through `np.lib.format.open_memmap`, so a store can be filled chunk by chunk without
+    holding the data in memory, and are read back as read-only memmaps; batches are served by slicing.
+    """
+
+    def __init__(self, directory, arrays, meta=None):
+        self.directory = directory
+        self.arrays = arrays
+        self.meta = meta or {}
+
+    @classmethod
+    def create(cls, directory, n, specs, meta=None):
+        """
+        directory (str) : store location, created if missing
+        n (int) : number of rows
+        specs : {name: (row_shape, dtype)}
+        """
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(os.path.join(directory, INDEX)):
+            os.remove(os.path.join(directory, INDEX))
+        arrays = {name: np.lib.format.open_memmap(os.path.join(directory, name + ".npy"), mode="w+",
+                                                  dtype=dtype, shape=(n,) + tuple(shape))
+                  for name, (shape, dtype) in specs.items()}
+        return cls(directory, arrays, meta)
+
+    @classmethod
+    def open(cls, directory):
+        with open(os.path.join(directory, INDEX)) as f:
+            index = json.load(f)
+        arrays = {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+                  for name in index["tensors"]}
+        return cls(directory, arrays, index["meta"])
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, INDEX))
+
+    def close(self):
+        """Flushes the tensors and writes the index; a store without an index is incomplete."""
+        for values in self.arrays.values():
+            if isinstance(values, np.memmap):
+                values.flush()
+        index = {"n": len(self),
+                 "tensors": {name: {"shape": list(values.shape[1:]), "dtype": values.dtype.str}
+                             for name, values in self.arrays.items()},
+                 "meta": self.meta}
+        with open(os.path.join(self.directory, INDEX), "w") as f:
+            json.dump(index, f, indent=1)
+        return self
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values())))
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def write(self, start, **values):
+        """Writes rows [start, start + len) of the given tensors."""
+        for name, rows in values.items():
+            self.arrays[name][start:start + len(rows)] = rows
+
+    def batches(self, batch_size, names, indices=None, dtype=None, scale=None):
+        """
+        Yields lists of batches of the tensors `names`, in row order or in the order of `indices`
+        (within a batch rows are read in file order, which keeps memmap reads sequential).
+        dtype / scale : conversion applied per batch to the first tensor only (e.g. uint8 images to float32 / 255),
+                        so the full tensor is never converted; scale without dtype converts to float32
+        """
+        if scale is not None and dtype is None:
+            dtype = np.float32
+        n = len(self) if indices is None else len(indices)
+        for start in range(0, n, batch_size):
+            if indices is None:
+                rows = slice(start, start + batch_size)
+            else:
+                rows = np.sort(indices[start:start + batch_size])
+            batch = [np.asarray(self.arrays[name][rows]) for name in names]
+            if dtype is not None:
+                batch[0] = batch[0].astype(dtype)
+            if scale is not None:
+                batch[0] *= scale
+            yield batch
+
+    def predict(self, predict_fn, batch_size, names, dtype=None, scale=None):
+        """Runs predict_fn(batch) over the store in bounded memory and stacks the results."""
+        return np.concatenate([np.asarray(predict_fn(batch[0] if len(batch) == 1 else batch))
+                               for batch in self.batches(batch_size, names, dtype=dtype, scale=scale)])
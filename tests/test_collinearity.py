@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from common import correlated_columns
+
+
+def upper_triangle_scan(df, threshold=0.95):
+    corr = df.corr().abs()
+    upper = corr.where(np.triu(np.ones(corr.shape), k=1).astype(bool))
+    return [column for column in upper.columns if any(upper[column] > threshold)]
+
+
+def frame_with_gaps(n=300, seed=0):
+    rng = np.random.RandomState(seed)
+    a = rng.randn(n)
+    a[n // 2:] = np.nan
+    df = pd.DataFrame({"a": a,
+                       # constant over the rows where "a" is present, varying elsewhere
+                       "b": np.where(np.isnan(a), rng.randn(n) * 3 + 7, 0.1),
+                       "c": a * 2 + rng.randn(n) * 0.01,
+                       "d": rng.randn(n),
+                       "e": np.where(np.isnan(a), rng.randn(n), 1 / 3),
+                       "f": rng.randn(n)})
+    df["g"] = df["d"] * -3 + rng.randn(n) * 0.01
+    df.loc[rng.rand(n) < 0.2, "g"] = np.nan
+    df["h"] = 1.0
+    df.loc[rng.rand(n) < 0.1, ["d", "f"]] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 3, 7, 256])
+def test_matches_pandas_with_missing_and_pairwise_constant_columns(block_size):
+    df = frame_with_gaps()
+    assert correlated_columns(df, 0.95, block_size) == upper_triangle_scan(df, 0.95)
+
+
+@pytest.mark.parametrize("block_size", [5, 64])
+def test_matches_pandas_without_missing(block_size):
+    rng = np.random.RandomState(1)
+    base = rng.randn(500, 10)
+    values = base[:, rng.randint(0, 10, 40)] + rng.randn(500, 40) * rng.choice([0.05, 0.5, 2], 40)
+    df = pd.DataFrame(values, columns=[f"c{i}" for i in range(40)])
+    expected = upper_triangle_scan(df)
+    assert expected
+    assert correlated_columns(df, 0.95, block_size) == expected
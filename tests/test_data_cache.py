@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from common.data_cache import cached_frame, read_csv, read_json
+
+
+def test_read_csv_serves_cache(tmp_path):
+    path = tmp_path / "train.csv"
+    df = pd.DataFrame({"id": np.arange(5), "value": np.linspace(0, 1, 5), "name": list("abcde")})
+    df.to_csv(path, index=False)
+
+    pd.testing.assert_frame_equal(read_csv(str(path)), df)
+    pd.testing.assert_frame_equal(read_csv(str(path)), df)
+    assert list((tmp_path / ".cache").glob("*.feather"))
+
+
+def test_read_json_mixed_object_column(tmp_path):
+    # Statoil style inc_angle: floats with "na" for the missing ones
+    path = tmp_path / "train.json"
+    rows = [{"id": "a", "inc_angle": 39.5}, {"id": "b", "inc_angle": "na"}, {"id": "c", "inc_angle": 41.25}]
+    path.write_text(json.dumps(rows))
+
+    expected = pd.read_json(str(path))
+    assert expected["inc_angle"].dtype == object
+    first = read_json(str(path))
+    second = read_json(str(path))
+    pd.testing.assert_frame_equal(first, expected)
+    pd.testing.assert_frame_equal(second, expected)
+    assert not list((tmp_path / ".cache").glob("*.feather"))
+    assert list((tmp_path / ".cache").glob("*.pkl"))
+
+
+def test_cached_frame_keys_on_frame_content(tmp_path):
+    # frames that print the same (elided rows, rounded floats) must not share a cache entry
+    path = tmp_path / "values.csv"
+    pd.DataFrame({"value": np.arange(200)}).to_csv(path, index=False)
+
+    def scaled(p, factors):
+        return pd.read_csv(p) * factors["factor"].iloc[100]
+
+    factors = pd.DataFrame({"factor": np.ones(200)})
+    other = factors.copy()
+    other.loc[100, "factor"] = 1 + 1e-9
+    assert repr(factors) == repr(other)
+
+    assert cached_frame(str(path), scaled, factors)["value"].iloc[1] == 1
+    assert cached_frame(str(path), scaled, other)["value"].iloc[1] == 1 + 1e-9
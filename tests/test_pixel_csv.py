@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from common.pixel_csv import count_rows, parse_uint8_lines, store_pixel_csv
+
+
+def test_parses_values_in_range():
+    block = b"0,9,10,99,100,255\n7,42,200,1,0,250\n"
+    expected = np.array([[0, 9, 10, 99, 100, 255], [7, 42, 200, 1, 0, 250]], dtype=np.uint8)
+    np.testing.assert_array_equal(parse_uint8_lines(block, 6), expected)
+
+
+@pytest.mark.parametrize("field", [b"300", b"999", b"256", b"-1", b" 3", b"1.5", b"a", b"", b"1000"])
+def test_malformed_fields_raise(field):
+    with pytest.raises(ValueError):
+        parse_uint8_lines(b"1," + field + b",2\n", 3)
+
+
+def test_wrong_field_count_raises():
+    with pytest.raises(ValueError):
+        parse_uint8_lines(b"1,2,3\n4,5\n", 3)
+
+
+def test_store_matches_pandas(tmp_path):
+    rng = np.random.RandomState(0)
+    pixels = rng.randint(0, 256, (50, 16))
+    df = pd.DataFrame(pixels, columns=[f"pixel{i}" for i in range(16)])
+    df.insert(0, "label", rng.randint(0, 10, 50))
+    path = tmp_path / "train.csv"
+    df.to_csv(path, index=False)
+
+    store = store_pixel_csv(str(path), str(tmp_path / "store"), side=4, block_size=100)
+    np.testing.assert_array_equal(store["images"].reshape(50, 16), pixels)
+    np.testing.assert_array_equal(store["labels"], df["label"])
+
+
+@pytest.mark.parametrize("block_size", [7, 1 << 20])
+@pytest.mark.parametrize("ending", [b"\n\n", b"\n\n\n", b"\r\n\r\n", b"\n"])
+def test_blank_lines_are_skipped(tmp_path, block_size, ending):
+    path = tmp_path / "test.csv"
+    path.write_bytes(b"label,p0,p1,p2,p3\n1,0,255,7,8\n\n2,10,20,30,40" + ending)
+
+    assert count_rows(str(path)) == len(pd.read_csv(path)) == 2
+    store = store_pixel_csv(str(path), str(tmp_path / "store"), side=2, block_size=block_size)
+    np.testing.assert_array_equal(store["images"].reshape(2, 4), [[0, 255, 7, 8], [10, 20, 30, 40]])
+    np.testing.assert_array_equal(store["labels"], [1, 2])
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Porto"))
+from porto_data import build_meta, read_meta, read_compact  # noqa: E402
+
+
+def porto_frames(n=3000):
+    rng = np.random.RandomState(0)
+    train = pd.DataFrame({
+        "id": np.arange(n) * 7,
+        "target": rng.randint(0, 2, n),
+        "ps_ind_06_bin": rng.randint(0, 2, n),
+        "ps_car_01_cat": rng.randint(-1, 12, n),
+        "ps_car_11": rng.randint(-1, 4, n),
+        "ps_reg_03": np.where(rng.rand(n) < 0.1, -1, rng.rand(n).round(4)),
+        # integers in the first rows only, a sample would call it ordinal
+        "ps_calc_01": np.r_[rng.randint(0, 10, n - 10), rng.rand(10)],
+    })
+    test = train.drop(columns="target").assign(id=train["id"] + 1)
+    # a value only the test file has, beyond int16
+    test.loc[n - 1, "ps_car_11"] = 40000
+    return train, test
+
+
+@pytest.fixture
+def porto_files(tmp_path):
+    train, test = porto_frames()
+    paths = str(tmp_path / "train.csv"), str(tmp_path / "test.csv")
+    train.to_csv(paths[0], index=False)
+    test.to_csv(paths[1], index=False)
+    return paths
+
+
+def test_levels_match_full_build_meta(porto_files):
+    meta = read_meta(porto_files[0], chunksize=1000)
+    expected = build_meta(pd.read_csv(porto_files[0]))
+    pd.testing.assert_frame_equal(meta[expected.columns], expected)
+    assert meta.loc["ps_calc_01", "level"] == "interval"
+
+
+@pytest.mark.parametrize("missing_as_na", [True, False])
+def test_read_compact_keeps_every_value(porto_files, missing_as_na):
+    meta = read_meta(*porto_files, chunksize=1000)
+    for path in porto_files:
+        df = read_compact(path, meta, missing_as_na=missing_as_na, verbose=False)
+        raw = pd.read_csv(path, na_values=["-1"] if missing_as_na else None)
+        pd.testing.assert_frame_equal(df.astype("float64"), raw.astype("float64"), rtol=1e-6)
+    assert df["ps_car_11"].max() == 40000
+
+
+def test_warm_read_meta_skips_the_csv(porto_files, monkeypatch):
+    cold = read_meta(*porto_files, chunksize=1000)
+
+    def read_csv(*args, **kwargs):
+        raise AssertionError("csv read on a warm start")
+
+    monkeypatch.setattr(pd, "read_csv", read_csv)
+    pd.testing.assert_frame_equal(read_meta(*porto_files, chunksize=1000), cold)
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from common import process_pool
+from common.process_pool import InlineExecutor, fork_pool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "Porto"))
+sys.path.insert(0, os.path.join(ROOT, "Costa-rican"))
+import fold_runner  # noqa: E402
+import model_zoo  # noqa: E402
+
+
+def disable_fork(monkeypatch):
+    for module in (process_pool, fold_runner, model_zoo):
+        monkeypatch.setattr(module, "can_fork", lambda: False)
+
+
+def test_inline_executor_runs_and_raises():
+    with InlineExecutor() as executor:
+        assert executor.submit(pow, 2, 10).result() == 1024
+        with pytest.raises(ZeroDivisionError):
+            executor.submit(lambda: 1 / 0).result()
+
+
+def test_without_fork_the_pool_is_inline(monkeypatch):
+    disable_fork(monkeypatch)
+    with pytest.warns(UserWarning, match="fork is not available"):
+        executor = fork_pool(4, name="test")
+    assert isinstance(executor, InlineExecutor)
+
+
+def mean_fold(shared, fold, train_index, valid_index, n_threads):
+    X = shared["X"]
+    return X[valid_index, 0] - X[train_index].mean(), shared["test"][:, 0] + fold
+
+
+def test_run_folds_without_fork_matches(monkeypatch):
+    rng = np.random.RandomState(0)
+    arrays = {"X": rng.rand(30, 3), "test": rng.rand(5, 3)}
+    folds = [(np.setdiff1d(np.arange(30), valid), valid) for valid in np.array_split(np.arange(30), 3)]
+    expected = None
+    if process_pool.can_fork():
+        expected = fold_runner.run_folds(mean_fold, arrays, folds, n_test=5, n_workers=2)
+
+    disable_fork(monkeypatch)
+    with pytest.warns(UserWarning):
+        oof_pred, test_pred = fold_runner.run_folds(mean_fold, arrays, folds, n_test=5, n_workers=2)
+    assert not fold_runner._shared
+    np.testing.assert_allclose(test_pred, arrays["test"][:, 0] + 1)
+    if expected is not None:
+        np.testing.assert_allclose(oof_pred, expected[0])
+        np.testing.assert_allclose(test_pred, expected[1])
+
+
+def test_run_zoo_without_fork_matches(monkeypatch):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score, make_scorer
+
+    rng = np.random.RandomState(0)
+    X, y = rng.rand(60, 4), rng.randint(0, 2, 60)
+    models = {"weak": LogisticRegression(C=0.01), "strong": LogisticRegression(C=100.0)}
+    scorer = make_scorer(accuracy_score)
+    expected = None
+    if process_pool.can_fork():
+        expected = model_zoo.run_zoo(models, X, y, cv=3, scoring=scorer, n_workers=2, cache_dir=None)
+
+    disable_fork(monkeypatch)
+    with pytest.warns(UserWarning):
+        results = model_zoo.run_zoo(models, X, y, cv=3, scoring=scorer, cache_dir=None)
+    assert not model_zoo._data
+    assert results["n_folds"].tolist() == [3, 3]
+    if expected is not None:
+        np.testing.assert_allclose(results["cv_mean"], expected["cv_mean"])
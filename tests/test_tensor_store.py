@@ -0,0 +1,35 @@
+import numpy as np
+
+from common.tensor_store import TensorStore
+
+
+def make_store(directory):
+    images = np.arange(10 * 4, dtype=np.uint8).reshape(10, 2, 2)
+    labels = np.arange(10, dtype=np.int64)
+    store = TensorStore.create(str(directory), 10, {"images": ((2, 2), np.uint8), "labels": ((), np.int64)})
+    store.write(0, images=images, labels=labels)
+    store.close()
+    return TensorStore.open(str(directory)), images, labels
+
+
+def test_batches_in_index_order(tmp_path):
+    store, images, labels = make_store(tmp_path)
+    indices = np.array([7, 2, 9, 0, 5])
+    batches = list(store.batches(2, ["images", "labels"], indices=indices))
+    assert [len(b[1]) for b in batches] == [2, 2, 1]
+    np.testing.assert_array_equal(np.concatenate([b[1] for b in batches]), [2, 7, 0, 9, 5])
+
+
+def test_scale_without_dtype_gives_float32(tmp_path):
+    store, images, _ = make_store(tmp_path)
+    batch, = next(store.batches(4, ["images"], scale=1 / 255))
+    assert batch.dtype == np.float32
+    np.testing.assert_allclose(batch, images[:4] / 255, rtol=1e-6)
+    # the store itself is untouched
+    np.testing.assert_array_equal(store["images"], images)
+
+
+def test_predict_with_dtype_and_scale(tmp_path):
+    store, images, _ = make_store(tmp_path)
+    sums = store.predict(lambda x: x.reshape(len(x), -1).sum(axis=1), 3, ["images"], dtype=np.float64, scale=0.5)
+    np.testing.assert_allclose(sums, images.reshape(10, -1).sum(axis=1) * 0.5)